@@ -0,0 +1,303 @@
+import os
+import random
+
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from icy_tower import (WIDTH, HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, CAMERA_SPEED, CAMERA_FOLLOW_HEIGHT,
+                       COIN_PICKUP_RADIUS, LIVE_PLATFORMS, REGIONS, DIFFICULTY_SETTINGS,
+                       INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP, INPUT_HYPER, Player, Platform, Tower)
+
+# Stany postaci (Player.character_state) jako liczby
+STATE_NORMAL = 0
+STATE_CHARGED = 1
+STATE_READY = 2
+STATE_HYPER = 3
+
+# Przyczyny końca gry
+CAUSE_NONE = 0
+CAUSE_SPIKE = 1
+CAUSE_LAVA = 2
+CAUSE_FALL = 3
+CAUSE_NAMES = (None, "spike", "lava", "fall")
+
+REGION_HEIGHTS = np.array([region["height"] for region in REGIONS], dtype=np.float64)
+
+# N niezależnych gier w tablicach NumPy, krok wszystkich naraz. Reguły są te
+# same co w Simulation.step / Player.update / Platform.update i dla tego samego
+# ziarna i wejścia gra przebiega identycznie. Skończona gra jest od razu
+# restartowana z kolejnym ziarnem, a jej wynik trafia do final_*.
+class BatchedEnv:
+    def __init__(self, num_games, difficulty="Casual", first_seed=0, live_platforms=LIVE_PLATFORMS):
+        self.num_games = num_games
+        self.difficulty = difficulty
+        self.live_platforms = live_platforms
+        self.rows = np.arange(num_games)
+
+        # Parametry gracza jak w Player
+        template = Player()
+        self.speed = template.speed
+        self.jump_power = template.jump_power
+        self.hyper_jump_power = template.hyper_jump_power
+        self.gravity = template.gravity
+        self.max_coins = template.max_coins
+        self.max_hyper_jump_charges = template.max_hyper_jump_charges
+
+        settings = DIFFICULTY_SETTINGS[difficulty]
+        self.lava_start = settings["lava_start"]
+        self.lava_speed = settings["lava_speed"]
+        self.lava_enabled = difficulty != "No Lava"
+
+        n, p = num_games, live_platforms
+        # Gracz
+        self.x = np.zeros(n)
+        self.y = np.zeros(n)
+        self.vel_x = np.zeros(n)
+        self.vel_y = np.zeros(n)
+        self.prev_y = np.zeros(n)
+        self.on_ground = np.zeros(n, dtype=bool)
+        self.on_slippery = np.zeros(n, dtype=bool)
+        self.jump_cooldown = np.zeros(n, dtype=np.int64)
+        self.first_jump_made = np.zeros(n, dtype=bool)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.highest_platform = np.zeros(n)
+        self.current_region = np.zeros(n, dtype=np.int64)
+        self.coins = np.zeros(n, dtype=np.int64)
+        self.hyper_jump_charges = np.zeros(n, dtype=np.int64)
+        self.hyper_jump_active = np.zeros(n, dtype=bool)
+        self.hyper_jump_effect_time = np.zeros(n, dtype=np.int64)
+        self.character_state = np.zeros(n, dtype=np.int64)
+        # Świat
+        self.camera_y = np.zeros(n)
+        self.target_camera_y = np.zeros(n)
+        self.lava_height = np.zeros(n)
+        self.lava_active = np.zeros(n, dtype=bool)
+        self.frame = np.zeros(n, dtype=np.int64)
+        # Tabela platform: jeden wiersz na grę, valid oznacza zajęte miejsce
+        self.plat_valid = np.zeros((n, p), dtype=bool)
+        self.plat_x = np.zeros((n, p))
+        self.plat_y = np.zeros((n, p))
+        self.plat_width = np.zeros((n, p))
+        self.plat_vel_x = np.zeros((n, p))
+        self.plat_left = np.zeros((n, p))
+        self.plat_right = np.zeros((n, p))
+        self.plat_moving = np.zeros((n, p), dtype=bool)
+        self.plat_slippery = np.zeros((n, p), dtype=bool)
+        self.plat_spikes = np.zeros((n, p), dtype=bool)
+        self.plat_spike_offset = np.zeros((n, p))
+        self.plat_coin = np.zeros((n, p), dtype=bool)
+        # Wyniki gier zakończonych w ostatnim kroku
+        self.done = np.zeros(n, dtype=bool)
+        self.final_score = np.zeros(n, dtype=np.int64)
+        self.final_region = np.zeros(n, dtype=np.int64)
+        self.final_cause = np.zeros(n, dtype=np.int64)
+
+        # Generatory i wieże - po jednym na grę, używane tylko poza pętlą wektorową
+        self.seeds = [0] * n
+        self.rngs = [None] * n
+        self.towers = [None] * n
+        self.tower_cursor = [None] * n
+        for i in range(n):
+            self.reset_game(i, first_seed + i)
+
+    def reset_game(self, i, seed):
+        self.seeds[i] = seed
+        rng = random.Random(seed)
+        self.rngs[i] = rng
+
+        template = Player()
+        self.x[i] = template.x
+        self.y[i] = template.y
+        self.prev_y[i] = template.y
+        self.vel_x[i] = 0
+        self.vel_y[i] = 0
+        self.on_ground[i] = False
+        self.on_slippery[i] = False
+        self.jump_cooldown[i] = 0
+        self.first_jump_made[i] = False
+        self.score[i] = 0
+        self.highest_platform[i] = template.highest_platform
+        self.current_region[i] = 0
+        self.coins[i] = 0
+        self.hyper_jump_charges[i] = 0
+        self.hyper_jump_active[i] = False
+        self.hyper_jump_effect_time[i] = 0
+        self.character_state[i] = STATE_NORMAL
+        self.camera_y[i] = 0
+        self.target_camera_y[i] = 0
+        self.lava_height[i] = self.lava_start
+        self.lava_active[i] = False
+        self.frame[i] = 0
+
+        # Platforma startowa i wieża tak samo jak w Simulation
+        self.plat_valid[i] = False
+        self.load_platform(i, 0, Platform(0, HEIGHT - 100, WIDTH, 0, rng))
+        self.towers[i] = Tower(seed, cache_size=4)
+        self.tower_cursor[i] = [0, 0]
+        self.fill_platforms(i)
+
+    def load_platform(self, i, slot, platform):
+        self.plat_valid[i, slot] = True
+        self.plat_x[i, slot] = platform.x
+        self.plat_y[i, slot] = platform.y
+        self.plat_width[i, slot] = platform.width
+        self.plat_vel_x[i, slot] = platform.vel_x
+        self.plat_left[i, slot] = platform.left_limit
+        self.plat_right[i, slot] = platform.right_limit
+        self.plat_moving[i, slot] = platform.is_moving
+        self.plat_slippery[i, slot] = platform.is_slippery
+        self.plat_spikes[i, slot] = platform.has_spikes
+        self.plat_spike_offset[i, slot] = platform.spike_offset
+        self.plat_coin[i, slot] = platform.has_coin and not platform.coin_collected
+
+    def fill_platforms(self, i):
+        tower = self.towers[i]
+        cursor = self.tower_cursor[i]
+        for slot in np.flatnonzero(~self.plat_valid[i]):
+            self.load_platform(i, slot, tower.platform(cursor[0], cursor[1]))
+            cursor[1] += 1
+            if cursor[1] == len(tower.chunk(cursor[0])):
+                cursor[0] += 1
+                cursor[1] = 0
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        rows = self.rows
+
+        # Wejście
+        left = (actions & INPUT_LEFT) != 0
+        right = (actions & INPUT_RIGHT) != 0
+        self.vel_x[left] = -self.speed
+        self.vel_x[right] = self.speed
+
+        # Skok (Player.jump)
+        jumping = ((actions & INPUT_JUMP) != 0) & self.on_ground & (self.jump_cooldown == 0)
+        if jumping.any():
+            use_hyper = self.hyper_jump_active & (self.hyper_jump_charges > 0)
+            force = np.where(use_hyper, self.hyper_jump_power, self.jump_power).astype(np.float64)
+            slippery_jump = jumping & self.on_slippery
+            force = np.where(slippery_jump, force * 1.2, force)
+            for i in np.flatnonzero(slippery_jump):
+                rng = self.rngs[i]
+                direction = 1 if rng.random() > 0.5 else -1
+                self.vel_x[i] += direction * rng.uniform(8.0, 12.0)
+
+            hyper_jump = jumping & use_hyper
+            self.hyper_jump_charges[hyper_jump] -= 1
+            self.hyper_jump_active[hyper_jump] = False
+            self.hyper_jump_effect_time[hyper_jump] = 30
+            self.character_state[hyper_jump] = STATE_HYPER
+            self.coins[hyper_jump] = 0
+
+            self.vel_y = np.where(jumping, force, self.vel_y)
+            self.on_ground[jumping] = False
+            self.jump_cooldown[jumping] = 5
+            self.first_jump_made |= jumping
+
+        # Aktywacja hiper skoku
+        activate = ((actions & INPUT_HYPER) != 0) & (self.hyper_jump_charges > 0) & ~self.hyper_jump_active
+        self.hyper_jump_active |= activate
+        self.character_state[activate] = STATE_READY
+
+        # Kamera
+        follow = HEIGHT * CAMERA_FOLLOW_HEIGHT
+        self.target_camera_y = np.where(self.y < self.camera_y + follow, self.y - follow, self.target_camera_y)
+        self.camera_y += (self.target_camera_y - self.camera_y) * CAMERA_SPEED
+        camera_y = self.camera_y
+
+        # Lawa
+        if self.lava_enabled:
+            self.lava_active |= self.first_jump_made
+        self.lava_height = np.where(self.lava_active, self.lava_height - self.lava_speed, self.lava_height)
+
+        # Ruchome platformy (Platform.update)
+        moving = self.plat_moving & self.plat_valid
+        self.plat_x = np.where(moving, self.plat_x + self.plat_vel_x, self.plat_x)
+        bounce = moving & ((self.plat_x >= self.plat_right) | (self.plat_x <= self.plat_left))
+        self.plat_vel_x = np.where(bounce, -self.plat_vel_x, self.plat_vel_x)
+        self.plat_x = np.where(bounce, np.minimum(np.maximum(self.plat_x, self.plat_left), self.plat_right), self.plat_x)
+
+        # Monety (Platform.check_coin_collection)
+        coin_dx = (self.x + PLAYER_WIDTH / 2)[:, None] - (self.plat_x + self.plat_width / 2)
+        coin_dy = (self.y + PLAYER_HEIGHT / 2)[:, None] - (self.plat_y - 30)
+        collected = self.plat_coin & self.plat_valid & (coin_dx * coin_dx + coin_dy * coin_dy < COIN_PICKUP_RADIUS * COIN_PICKUP_RADIUS)
+        if collected.any():
+            self.plat_coin &= ~collected
+            gained = collected.sum(axis=1)
+            charging = (self.coins < self.max_coins) & (self.coins + gained >= self.max_coins)
+            self.coins = np.where(self.coins < self.max_coins, np.minimum(self.coins + gained, self.max_coins), self.coins)
+            self.hyper_jump_charges = np.where(charging, np.minimum(self.max_hyper_jump_charges, self.hyper_jump_charges + 1), self.hyper_jump_charges)
+            self.character_state[charging] = STATE_CHARGED
+
+        # Fizyka gracza (Player.update)
+        self.prev_y = self.y.copy()
+        self.vel_y += self.gravity
+        self.y += self.vel_y
+        self.x += self.vel_x
+        self.vel_x *= 0.9
+        self.x = np.maximum(0, np.minimum(self.x, WIDTH - PLAYER_WIDTH))
+        self.jump_cooldown = np.where(self.jump_cooldown > 0, self.jump_cooldown - 1, 0)
+        self.on_ground[:] = False
+        self.on_slippery[:] = False
+
+        # Lądowanie - spośród trafionych platform wygrywa najniższa (jak w kolejności okna)
+        feet = self.y + PLAYER_HEIGHT
+        prev_feet = self.prev_y + PLAYER_HEIGHT
+        x = self.x
+        candidates = (self.plat_valid & (self.vel_y > 0)[:, None]
+                      & (feet[:, None] >= self.plat_y) & (prev_feet[:, None] <= self.plat_y)
+                      & (x[:, None] + PLAYER_WIDTH > self.plat_x) & (x[:, None] < self.plat_x + self.plat_width))
+        landed = candidates.any(axis=1)
+        spiked = np.zeros(self.num_games, dtype=bool)
+        if landed.any():
+            slot = np.argmax(np.where(candidates, self.plat_y, -np.inf), axis=1)
+            land_y = self.plat_y[rows, slot]
+            spike_x = self.plat_x[rows, slot] + self.plat_spike_offset[rows, slot]
+            spiked = landed & self.plat_spikes[rows, slot] & (np.abs(x + PLAYER_WIDTH / 2 - spike_x) < 15)
+            landed &= ~spiked
+
+            self.y = np.where(landed, land_y - PLAYER_HEIGHT, self.y)
+            self.vel_y = np.where(landed, 0.0, self.vel_y)
+            self.on_ground |= landed
+            self.on_slippery = landed & self.plat_slippery[rows, slot]
+
+            higher = landed & (land_y < self.highest_platform)
+            self.score += np.where(higher, ((self.highest_platform - land_y) / 10).astype(np.int64), 0)
+            self.highest_platform = np.where(higher, land_y, self.highest_platform)
+
+        # Region, efekt hiper skoku i naładowanie - pomijane po trafieniu kolcem
+        alive_update = ~spiked
+        region = np.argmax(self.highest_platform[:, None] > REGION_HEIGHTS[None, :], axis=1)
+        self.current_region = np.where(alive_update, region, self.current_region)
+
+        effect = alive_update & (self.hyper_jump_effect_time > 0)
+        self.hyper_jump_effect_time[effect] -= 1
+        effect_over = effect & (self.hyper_jump_effect_time == 0)
+        self.character_state[effect_over] = np.where(self.hyper_jump_charges[effect_over] > 0, STATE_CHARGED, STATE_NORMAL)
+
+        charged = alive_update & (self.coins >= self.max_coins) & (self.character_state == STATE_NORMAL)
+        self.character_state[charged] = STATE_CHARGED
+        self.hyper_jump_charges[charged] = 1
+
+        # Koniec gry
+        in_lava = self.y + PLAYER_HEIGHT > self.lava_height
+        fell = self.y > camera_y + HEIGHT
+        done = spiked | in_lava | fell
+        self.frame += 1
+
+        # Okno platform - usuń minięte, dopełnij z wieży
+        self.plat_valid &= self.plat_y < (camera_y + HEIGHT + 200)[:, None]
+        for i in np.flatnonzero(self.plat_valid.sum(axis=1) < self.live_platforms):
+            self.fill_platforms(i)
+
+        # Zakończone gry - zapamiętaj wynik i zacznij od nowa z kolejnym ziarnem
+        self.done = done
+        if done.any():
+            cause = np.where(spiked, CAUSE_SPIKE, np.where(in_lava, CAUSE_LAVA, CAUSE_FALL))
+            for i in np.flatnonzero(done):
+                self.final_score[i] = self.score[i]
+                self.final_region[i] = self.current_region[i]
+                self.final_cause[i] = cause[i]
+                self.reset_game(i, self.seeds[i] + self.num_games)
+        return done
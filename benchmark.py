@@ -0,0 +1,294 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform as platform_info
+from statistics import median
+
+# Benchmarki działają bez okna
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+import icy_tower
+from icy_tower import (HEIGHT, REGIONS, PROFILE_PHASES, INPUT_JUMP, INPUT_LEFT, INPUT_RIGHT,
+                       Player, PlatformIndex, Simulation, generate_platforms, draw_game)
+
+# Mierzy czas `number` wywołań fn, powtórzone `repeat` razy; wynik na jedno wywołanie
+def measure(fn, number, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        "median_us": median(timings) * 1e6,
+        "min_us": min(timings) * 1e6,
+        "per_second": 1.0 / median(timings),
+    }
+
+def bench_generation(results, number, repeat):
+    batch = 100
+    for region_index, region in enumerate(REGIONS):
+        rng = random.Random(region_index)
+        stats = measure(lambda: generate_platforms(batch, 0, region_index, rng=rng), number, repeat)
+        stats["platforms_per_second"] = stats["per_second"] * batch
+        results[f"generate_platforms[{region['name']}]"] = stats
+
+    # Partie NumPy (platform_batch) - tylko gdy jest NumPy
+    try:
+        import numpy as np
+        from platform_batch import generate_batch
+    except ImportError:
+        return
+    rows = 100
+    for region_index, region in enumerate(REGIONS):
+        rng = np.random.default_rng(region_index)
+        stats = measure(lambda: generate_batch(rng, rows, batch, 0, region_index), max(1, number // 10), repeat)
+        stats["platforms_per_second"] = stats["per_second"] * batch * rows
+        results[f"generate_batch[{region['name']}, {rows}x{batch}]"] = stats
+
+def bench_player_update(results, number, repeat):
+    # Gracz spada przez gęstą wieżę - koszt kolizji w zależności od liczby platform
+    for count in (30, 300, 3000):
+        rng = random.Random(count)
+        platforms = PlatformIndex(generate_platforms(count, 0, 2, rng=rng))
+        middle = platforms.platforms[count // 2]
+        player = Player(rng)
+
+        def update():
+            player.x = middle.x
+            player.y = middle.y - player.height - 5
+            player.vel_y = 6
+            player.update(platforms, middle.y - HEIGHT // 2, float('inf'))
+
+        results[f"Player.update[{count} platforms]"] = measure(update, number, repeat)
+
+def bench_platform_update(results, number, repeat):
+    # Stratosfera ma najwięcej ruchomych platform
+    rng = random.Random(4)
+    platforms = generate_platforms(1000, 0, len(REGIONS) - 1, rng=rng)
+    moving = sum(1 for p in platforms if p.is_moving)
+
+    def update():
+        for p in platforms:
+            p.update()
+
+    stats = measure(update, max(1, number // 10), repeat)
+    stats["moving_platforms"] = moving
+    stats["platform_updates_per_second"] = stats["per_second"] * len(platforms)
+    results["Platform.update[Stratosfera x1000]"] = stats
+
+def bench_simulation(results, number, repeat):
+    def run():
+        sim = Simulation("No Lava", seed=1)
+        for frame in range(number):
+            sim.step(INPUT_JUMP | (INPUT_LEFT if frame // 60 % 2 else INPUT_RIGHT))
+
+    stats = measure(run, 1, repeat)
+    stats["frames_per_second"] = number / (stats["median_us"] / 1e6)
+    results[f"Simulation.step[{number} frames]"] = stats
+
+def bench_snapshot(results, number, repeat):
+    # Stan po kilkuset klatkach gry - pełne okno platform i kilka sekund zapisu wejścia.
+    # Bez lawy, żeby gałąź nie kończyła się od razu końcem gry.
+    sim = Simulation("No Lava", seed=8)
+    for frame in range(600):
+        sim.step(INPUT_JUMP | (INPUT_LEFT if frame // 60 % 2 else INPUT_RIGHT))
+    snapshot = sim.snapshot()
+
+    def branch():
+        # Typowy krok przeszukiwania: powrót do migawki i krótka gałąź
+        sim.restore(snapshot)
+        for _ in range(10):
+            sim.step(INPUT_JUMP | INPUT_RIGHT)
+
+    results["Simulation.snapshot"] = measure(sim.snapshot, number, repeat)
+    results["Simulation.restore"] = measure(lambda: sim.restore(snapshot), number, repeat)
+    results["Simulation.restore+10 steps"] = measure(branch, number, repeat)
+    sim.restore(snapshot)
+
+def bench_draw(results, number, repeat):
+    # Sterownik dummy - "okno" to zwykła powierzchnia w pamięci
+    icy_tower.init_display()
+    font = pygame.font.Font(None, 36)
+    small_font = pygame.font.Font(None, 24)
+    large_font = pygame.font.Font(None, 72)
+
+    sim = Simulation("Casual", seed=2)
+    # Kilka klatek, żeby świat był w typowym stanie
+    for _ in range(30):
+        sim.step(0)
+    sim.player.coins = 3
+
+    def draw_platforms():
+        for p in sim.platforms:
+            p.draw(sim.camera_y)
+
+    results["Platform.draw[visible window]"] = measure(draw_platforms, number, repeat)
+    results["draw_game[playing]"] = measure(lambda: draw_game(sim, font, small_font, large_font, False), number, repeat)
+    tiles = icy_tower.TowerTiles()
+    results["draw_game[playing, tower tiles]"] = measure(
+        lambda: draw_game(sim, font, small_font, large_font, False, tiles=tiles), number, repeat)
+    results["draw_game[paused]"] = measure(lambda: draw_game(sim, font, small_font, large_font, True), number, repeat)
+    sim.game_over = True
+    results["draw_game[game over]"] = measure(lambda: draw_game(sim, font, small_font, large_font, False), number, repeat)
+
+def bench_observation(results, number, repeat):
+    # NumPy tylko dla tej grupy - reszta benchmarków działa bez niego
+    from observation import ObservationRasterizer
+
+    sim = Simulation("Casual", seed=2)
+    for _ in range(30):
+        sim.step(0)
+    rasterizer = ObservationRasterizer(stack=4)
+    results["ObservationRasterizer.observe[84x84]"] = measure(lambda: rasterizer.observe(sim), number, repeat)
+    results["ObservationRasterizer.stacked[4 frames]"] = measure(rasterizer.stacked, number, repeat)
+
+def bench_effects(results, number, repeat):
+    # NumPy tylko dla tej grupy. Budżet wyłączony, żeby mierzyć pełną liczbę cząsteczek.
+    from effects import ParticleSystem
+
+    icy_tower.init_display()
+    for count in (100, 1000):
+        particles = ParticleSystem(budget=float('inf'), seed=count)
+
+        def frame():
+            # Stała liczba żywych cząsteczek - uzupełnienie tych, które wygasły
+            if len(particles) < count:
+                particles.emit("spark", 400, 300, count - len(particles))
+            particles.update(1 / 60)
+            particles.draw(icy_tower.screen, 0)
+
+        results[f"ParticleSystem.update+draw[{count} particles]"] = measure(frame, number, repeat)
+
+# Budżet alokacji ustalonej rozgrywki - mediana kB obiektów Pythona na klatkę
+# (krok symulacji + rysowanie + wysłanie obrazu). Przekroczenie z --check-allocations
+# kończy benchmark kodem 1.
+ALLOCATION_BUDGET_KB = 1.0
+ALLOCATION_FRAMES = 600
+
+def steady_frames(frames, profiler=None):
+    # Rozgrywka bota bez okna, tak jak w game_loop: krok, rysowanie, wysłanie obrazu.
+    # Najpierw rozgrzewka, żeby pamięci podręczne sprite'ów i napisów były wypełnione.
+    from tournament import climber_policy
+
+    icy_tower.init_display()
+    font = icy_tower.get_font(36)
+    small_font = icy_tower.get_font(24)
+    large_font = icy_tower.get_font(72)
+    sim = Simulation("No Lava", seed=4)
+    act = climber_policy(random.Random(4))
+    dirty = icy_tower.DirtyRects()
+    tiles = icy_tower.TowerTiles()
+
+    def frame():
+        inputs = act(sim)
+        if profiler is not None:
+            profiler.start_frame()
+        sim.step(inputs)
+        draw_game(sim, font, small_font, large_font, False, dirty, 1.0, tiles)
+        if profiler is not None:
+            profiler.mark("draw")
+        dirty.update_display()
+        if profiler is not None:
+            profiler.mark("flip")
+            profiler.end_frame()
+
+    for _ in range(120):
+        frame()
+    sim.profiler = profiler
+    for _ in range(frames):
+        frame()
+    sim.profiler = None
+    return sim
+
+def bench_allocations(results, number, repeat):
+    profiler = icy_tower.FrameProfiler(window=ALLOCATION_FRAMES)
+    profiler.track_allocations(True)
+    try:
+        steady_frames(ALLOCATION_FRAMES, profiler)
+    finally:
+        allocations = profiler.allocations
+        profiler.track_allocations(False)
+
+    totals = allocations.frame_totals()
+    sizes = sorted(total[0] for total in totals)
+    stats = {
+        "frames": len(totals),
+        "kb_per_frame_p50": sizes[len(sizes) // 2] / 1024,
+        "kb_per_frame_max": sizes[-1] / 1024,
+        "blocks_retained": sum(total[1] for total in totals),
+        "gc_collections": sum(total[2] for total in totals),
+        "budget_kb": ALLOCATION_BUDGET_KB,
+        "phases": {},
+    }
+    for phase in PROFILE_PHASES:
+        kb, blocks, collections = allocations.phase_summary(phase)
+        if kb or blocks or collections:
+            stats["phases"][phase] = {"kb_p50": kb, "blocks": blocks, "gc": collections}
+    results["allocations[steady gameplay]"] = stats
+
+def check_allocations(results):
+    stats = results.get("allocations[steady gameplay]")
+    if stats is None:
+        return True
+    return stats["kb_per_frame_p50"] <= ALLOCATION_BUDGET_KB
+
+BENCHMARKS = {
+    "generation": bench_generation,
+    "player": bench_player_update,
+    "platforms": bench_platform_update,
+    "simulation": bench_simulation,
+    "snapshot": bench_snapshot,
+    "draw": bench_draw,
+    "observation": bench_observation,
+    "effects": bench_effects,
+    "allocations": bench_allocations,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarki symulacji, generowania i rysowania")
+    parser.add_argument("--number", type=int, default=1000, help="wywołań na pomiar")
+    parser.add_argument("--repeat", type=int, default=5, help="liczba powtórzeń pomiaru")
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), action="append", help="uruchom tylko wybrane grupy")
+    parser.add_argument("--out", help="zapisz wyniki JSON do pliku zamiast na stdout")
+    parser.add_argument("--check-allocations", action="store_true",
+                        help=f"kod wyjścia 1, gdy rozgrywka alokuje ponad {ALLOCATION_BUDGET_KB} kB na klatkę")
+    args = parser.parse_args()
+    if args.check_allocations and args.only and "allocations" not in args.only:
+        args.only.append("allocations")
+
+    pygame.init()
+    results = {}
+    for name in args.only or BENCHMARKS:
+        BENCHMARKS[name](results, args.number, args.repeat)
+
+    report = {
+        "python": sys.version.split()[0],
+        "pygame": pygame.version.ver,
+        "machine": platform_info.machine(),
+        "number": args.number,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    
+    if args.check_allocations and not check_allocations(results):
+        stats = results["allocations[steady gameplay]"]
+        print(f"allocation budget exceeded: {stats['kb_per_frame_p50']:.1f} kB per frame "
+              f"(budget {ALLOCATION_BUDGET_KB} kB)", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import zlib
+import queue
+import struct
+import argparse
+import threading
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+# Plik nagrania: nagłówek (szerokość, wysokość), potem klatki - numer klatki
+# gry, czas od startu nagrania, długość i piksele RGBX skompresowane zlib
+CAPTURE_MAGIC = b"ICYV"
+CAPTURE_HEADER = struct.Struct("<4sHH")
+FRAME_HEADER = struct.Struct("<IdI")
+CAPTURE_FORMAT = "RGBX"
+
+CAPTURE_FPS = 60
+CAPTURE_QUEUE_SIZE = 8
+CAPTURE_MAX_STRIDE = 8
+CAPTURE_LEVEL = 1
+
+# Nagrywanie rozgrywki. W pętli gry zostaje tylko jedna kopia ekranu
+# (pygame.image.tobytes) i włożenie jej do ograniczonej kolejki; kompresja
+# zlib i zapis idą w wątku piszącym (zlib i zapis pliku zwalniają GIL).
+# Gdy kolejka jest pełna, klatka jest gubiona, a odstęp między nagrywanymi
+# klatkami się podwaja (do CAPTURE_MAX_STRIDE); po opróżnieniu kolejki wraca
+# do pełnej częstotliwości. Pętla gry nigdy nie czeka na dysk.
+class FrameRecorder:
+    def __init__(self, path, fps=CAPTURE_FPS, queue_size=CAPTURE_QUEUE_SIZE, level=CAPTURE_LEVEL):
+        self.path = path
+        self.file = open(path, "wb")
+        self.interval = 1.0 / fps if fps else 0.0
+        self.level = level
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stride = 1
+        self.size = None
+        self.start = time.perf_counter()
+        self.next_time = self.start
+
+        # Statystyki: klatki oferowane (wywołania capture), nagrane, zgubione,
+        # czas w pętli gry i w wątku piszącym
+        self.offered = 0
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.raw_bytes = 0
+        self.written_bytes = 0
+        self.capture_time = 0.0
+        self.write_time = 0.0
+
+        self.thread = threading.Thread(target=self.writer, name="frame-writer", daemon=True)
+        self.thread.start()
+
+    def capture(self, surface, frame=None):
+        # Wywoływane po pygame.display.flip(); zwraca True, gdy klatka poszła do zapisu
+        start = time.perf_counter()
+        self.offered += 1
+        if start < self.next_time:
+            self.capture_time += time.perf_counter() - start
+            return False
+
+        if self.queue.full():
+            self.dropped += 1
+            self.stride = min(self.stride * 2, CAPTURE_MAX_STRIDE)
+            self.next_time = start + self.interval * self.stride
+            self.capture_time += time.perf_counter() - start
+            return False
+        if self.stride > 1 and self.queue.empty():
+            self.stride //= 2
+
+        if self.size is None:
+            self.size = surface.get_size()
+        data = pygame.image.tobytes(surface, CAPTURE_FORMAT)
+        self.queue.put_nowait((self.offered if frame is None else frame, start - self.start, data))
+        self.captured += 1
+        # Średnio fps klatek na sekundę; po przestoju bez serii nadrabiania
+        step = self.interval * self.stride
+        self.next_time = max(self.next_time + step, start - step)
+        self.capture_time += time.perf_counter() - start
+        return True
+
+    def writer(self):
+        header_written = False
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            start = time.perf_counter()
+            frame, timestamp, data = item
+            if not header_written:
+                self.file.write(CAPTURE_HEADER.pack(CAPTURE_MAGIC, *self.size))
+                header_written = True
+            compressed = zlib.compress(data, self.level)
+            self.file.write(FRAME_HEADER.pack(frame, timestamp, len(compressed)))
+            self.file.write(compressed)
+            self.written += 1
+            self.raw_bytes += len(data)
+            self.written_bytes += FRAME_HEADER.size + len(compressed)
+            self.write_time += time.perf_counter() - start
+
+    def close(self):
+        # Zapisuje klatki, które są jeszcze w kolejce
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        return self.stats()
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "offered": self.offered,
+            "captured": self.captured,
+            "dropped": self.dropped,
+            "written": self.written,
+            "stride": self.stride,
+            "capture_ms_per_frame": self.capture_time / max(self.offered, 1) * 1000,
+            "write_ms_per_frame": self.write_time / max(self.written, 1) * 1000,
+            "compression_ratio": self.raw_bytes / max(self.written_bytes, 1),
+        }
+
+    def summary(self):
+        stats = self.stats()
+        return (f"recorded {stats['written']} of {stats['offered']} frames to {self.path} "
+                f"({stats['dropped']} dropped), capture {stats['capture_ms_per_frame']:.3f} ms per frame "
+                f"in the game loop, {stats['write_ms_per_frame']:.2f} ms per frame in the writer")
+
+def read_frames(path):
+    # Klatki nagrania jako (numer klatki gry, czas, powierzchnia pygame)
+    with open(path, "rb") as f:
+        header = f.read(CAPTURE_HEADER.size)
+        if not header:
+            return
+        magic, width, height = CAPTURE_HEADER.unpack(header)
+        if magic != CAPTURE_MAGIC:
+            raise ValueError(f"{path}: not a capture file")
+        while True:
+            record = f.read(FRAME_HEADER.size)
+            if len(record) < FRAME_HEADER.size:
+                return
+            frame, timestamp, length = FRAME_HEADER.unpack(record)
+            data = f.read(length)
+            if len(data) < length:
+                raise ValueError(f"{path}: truncated frame {frame}")
+            yield frame, timestamp, pygame.image.frombuffer(zlib.decompress(data), (width, height), CAPTURE_FORMAT)
+
+def main():
+    parser = argparse.ArgumentParser(description="Podgląd i eksport nagrań z icy_tower.py --record")
+    parser.add_argument("path")
+    parser.add_argument("--png", metavar="DIR", help="zapisz klatki jako PNG do katalogu")
+    parser.add_argument("--every", type=int, default=1, help="eksportuj co n-tą klatkę")
+    args = parser.parse_args()
+
+    if args.png:
+        os.makedirs(args.png, exist_ok=True)
+    count = 0
+    first = last = None
+    try:
+        for i, (frame, timestamp, surface) in enumerate(read_frames(args.path)):
+            count += 1
+            if first is None:
+                first = timestamp
+            last = timestamp
+            if args.png and i % args.every == 0:
+                pygame.image.save(surface, os.path.join(args.png, f"frame_{i:07d}.png"))
+    except ValueError as error:
+        print(error)
+        return 1
+
+    duration = (last - first) if count else 0.0
+    fps = (count - 1) / duration if duration > 0 else 0.0
+    print(f"{count} frames, {duration:.1f} s, {fps:.1f} fps")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+# Sprawdzenie bez okna - symulacja nie potrzebuje wyświetlacza
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import icy_tower
+from icy_tower import DIFFICULTY_SETTINGS, Platform, Simulation
+from tournament import POLICIES
+
+# Szybkie ścieżki (przewijanie, gry wsadowe NumPy) powielają porównania
+# z Player.update, Platform.update i check_coin_collection, a migawki
+# Simulation.snapshot()/restore() muszą obejmować cały stan gry. Ten skrypt
+# porównuje je z Simulation.step na losowych przebiegach - po każdej zmianie
+# fizyki albo stanu gry powinien kończyć się bez rozbieżności.
+
+# Przebiegi to wspinaczka z tournament.py przerywana po lądowaniu odcinkami
+# bez wejścia (żeby było co przewijać). Żeby dojść do regionów z ruchomymi,
+# śliskimi i kolczastymi platformami, po śmierci gra wraca do ostatniego
+# punktu kontrolnego (Simulation.restore cofa też log wejścia) i próbuje
+# dalej po kilku losowych ruchach. Śmierć w bezruchu (lawa) kończy przebieg -
+# to zdarzenie, do którego przewija fast_forward. Log jest zwykłym logiem
+# jednego przebiegu.
+CLIMB_POLICIES = ("climber", "hyper_climber")
+IDLE_CHANCE = 0.05
+IDLE_RUN = (50, 1500)
+NUDGE_RUN = (5, 60)
+CHECKPOINT_FRAMES = 120
+MAX_RETRIES = 8
+
+def random_input_log(rng, seed, difficulty, frames):
+    # Log wejścia, ucięty na końcu gry
+    sim = Simulation(difficulty, seed=seed)
+    climb = POLICIES[rng.choice(CLIMB_POLICIES)](rng)
+    nudge = POLICIES["random"](rng)
+    checkpoint = sim.snapshot()
+    checkpoint_frame = sim.frame
+    retries = 0
+    idle = 0
+    nudging = 0
+    resting = False
+    while sim.frame < frames:
+        if sim.game_over:
+            if resting or retries == MAX_RETRIES:
+                break
+            sim.restore(checkpoint)
+            retries += 1
+            idle = 0
+            nudging = rng.randint(*NUDGE_RUN)
+        if sim.frame >= checkpoint_frame + CHECKPOINT_FRAMES:
+            checkpoint = sim.snapshot()
+            checkpoint_frame = sim.frame
+            retries = 0
+        resting = idle > 0
+        if idle:
+            idle -= 1
+            sim.step(0)
+        elif nudging:
+            nudging -= 1
+            sim.step(nudge(sim))
+        else:
+            sim.step(climb(sim))
+            if sim.player.on_ground and rng.random() < IDLE_CHANCE:
+                idle = rng.randint(*IDLE_RUN)
+    return bytes(sim.input_log)
+
+def sim_state(sim):
+    # Cały stan gry, który wpływa na dalszy przebieg, w postaci do porównania ==
+    player = sim.player
+    return {
+        "player": {name: value for name, value in vars(player).items() if name != "rng"},
+        "rng": player.rng.getstate(),
+        "platforms": [tuple(getattr(platform, name) for name in Platform.__slots__) for platform in sim.platforms],
+        "lava": vars(sim.lava).copy(),
+        "camera": (sim.camera_y, sim.prev_camera_y, sim.target_camera_y),
+        "score": sim.score,
+        "frame": sim.frame,
+        "game_over": (sim.game_over, sim.death_cause),
+        "tower": (sim.next_chunk, sim.next_position),
+        "input_log": bytes(sim.input_log),
+    }
+
+def state_diff(expected, actual):
+    # Nazwy rozbieżnych części stanu (dla gracza - nazwy pól)
+    diff = []
+    for key, value in expected.items():
+        if actual[key] == value:
+            continue
+        if key == "player":
+            diff.extend(f"player.{name}" for name, field in value.items() if actual[key].get(name) != field)
+        else:
+            diff.append(key)
+    return diff
+
+def check_fast_forward(rng, runs, frames):
+    # fast_forward.replay kontra icy_tower.replay dla tego samego logu wejścia
+    import fast_forward
+    failures = []
+    difficulties = list(DIFFICULTY_SETTINGS)
+    for run in range(runs):
+        seed = rng.getrandbits(32)
+        difficulty = difficulties[run % len(difficulties)]
+        input_log = random_input_log(rng, seed, difficulty, frames)
+        expected = sim_state(icy_tower.replay(seed, difficulty, input_log))
+        try:
+            actual = sim_state(fast_forward.replay(seed, difficulty, input_log))
+        except ValueError as error:
+            failures.append(f"seed {seed} {difficulty}, {len(input_log)} frames: {error}")
+            continue
+        if actual != expected:
+            failures.append(f"seed {seed} {difficulty}, {len(input_log)} frames: {', '.join(state_diff(expected, actual))}")
+    return failures
+
+# Pola gracza, które BatchedEnv trzyma w tablicach pod tą samą nazwą
+BATCHED_PLAYER_FIELDS = ("x", "y", "vel_x", "vel_y", "on_ground", "on_slippery", "jump_cooldown", "first_jump_made",
+                         "score", "highest_platform", "current_region", "coins", "hyper_jump_charges",
+                         "hyper_jump_active", "hyper_jump_effect_time")
+CHARACTER_STATES = ("normal", "charged", "ready", "hyper")
+
+def simulation_row(sim):
+    # Stan Simulation w układzie wiersza BatchedEnv
+    player = sim.player
+    row = {name: getattr(player, name) for name in BATCHED_PLAYER_FIELDS}
+    row["character_state"] = CHARACTER_STATES.index(player.character_state)
+    row["camera"] = (sim.camera_y, sim.target_camera_y)
+    row["lava"] = (sim.lava.height, sim.lava.active)
+    row["platforms"] = sorted((p.y, p.x, p.vel_x, p.has_coin and not p.coin_collected) for p in sim.platforms)
+    return row
+
+def batched_row(env, i):
+    row = {name: getattr(env, name)[i].item() for name in BATCHED_PLAYER_FIELDS}
+    row["character_state"] = env.character_state[i].item()
+    row["camera"] = (env.camera_y[i].item(), env.target_camera_y[i].item())
+    row["lava"] = (env.lava_height[i].item(), env.lava_active[i].item())
+    valid = env.plat_valid[i]
+    row["platforms"] = sorted(zip(env.plat_y[i][valid].tolist(), env.plat_x[i][valid].tolist(),
+                                  env.plat_vel_x[i][valid].tolist(), env.plat_coin[i][valid].tolist()))
+    return row
+
+def check_batched_env(rng, runs, frames):
+    # BatchedEnv kontra Simulation dla tych samych ziaren i logów wejścia,
+    # klatka po klatce aż do końca każdej gry (potem BatchedEnv ją restartuje)
+    from batched_env import BatchedEnv, CAUSE_NAMES
+    failures = []
+    difficulties = list(DIFFICULTY_SETTINGS)
+    for index, difficulty in enumerate(difficulties):
+        games = runs // len(difficulties) + (index < runs % len(difficulties))
+        if not games:
+            continue
+        first_seed = rng.getrandbits(32)
+        env = BatchedEnv(games, difficulty, first_seed=first_seed)
+        logs = [random_input_log(rng, first_seed + i, difficulty, frames) for i in range(games)]
+        sims = [Simulation(difficulty, seed=first_seed + i) for i in range(games)]
+        active = set(range(games))
+        actions = [0] * games
+        for frame in range(frames):
+            if not active:
+                break
+            for i in range(games):
+                actions[i] = logs[i][frame] if i in active and frame < len(logs[i]) else 0
+            done = env.step(actions)
+            for i in list(active):
+                sim = sims[i]
+                sim.step(actions[i])
+                label = f"seed {first_seed + i} {difficulty}, frame {frame}"
+                if sim.game_over or done[i]:
+                    active.discard(i)
+                    if not (sim.game_over and done[i]):
+                        failures.append(f"{label}: game over {sim.game_over}, batched done {bool(done[i])}")
+                    elif (env.final_score[i], CAUSE_NAMES[env.final_cause[i]]) != (sim.score, sim.death_cause):
+                        failures.append(f"{label}: batched score {env.final_score[i]} {CAUSE_NAMES[env.final_cause[i]]}, "
+                                        f"simulation {sim.score} {sim.death_cause}")
+                    continue
+                expected = simulation_row(sim)
+                actual = batched_row(env, i)
+                if actual != expected:
+                    active.discard(i)
+                    failures.append(f"{label}: {', '.join(key for key in expected if actual[key] != expected[key])}")
+    return failures
+
+# Cofanie jak w przeszukiwaniu drzewa: co ROLLBACK_CHANCE klatek nowa
+# migawka (trzymanych jest do ROLLBACK_SAVED), potem kilka odgałęzień
+# wspinaczki (skoki, monety, nowe platformy, śmierć) z losowo wybranych
+# migawek - w dowolnej kolejności, także starsza przed nowszą - i powrót do
+# bieżącej. Każde restore musi dać stan z chwili zrobienia tej migawki.
+ROLLBACK_CHANCE = 0.02
+ROLLBACK_SAVED = 4
+ROLLBACK_BRANCHES = (1, 4)
+ROLLBACK_RUN = (1, 120)
+
+def check_rollback(rng, runs, frames):
+    # Simulation z odgałęzieniami cofanymi przez restore() kontra przebieg wprost
+    failures = []
+    difficulties = list(DIFFICULTY_SETTINGS)
+    for run in range(runs):
+        seed = rng.getrandbits(32)
+        difficulty = difficulties[run % len(difficulties)]
+        input_log = random_input_log(rng, seed, difficulty, frames)
+        label = f"seed {seed} {difficulty}, {len(input_log)} frames"
+        sim = Simulation(difficulty, seed=seed)
+        saved = []
+        error = None
+        for frame, inputs in enumerate(input_log):
+            if rng.random() < ROLLBACK_CHANCE:
+                current = (frame, sim.snapshot(), sim_state(sim))
+                if len(saved) == ROLLBACK_SAVED:
+                    saved.pop(rng.randrange(len(saved)))
+                saved.append(current)
+                branches = [rng.choice(saved) for _ in range(rng.randint(*ROLLBACK_BRANCHES))]
+                for entry in branches + [current]:
+                    saved_frame, snapshot, state = entry
+                    sim.restore(snapshot)
+                    restored = sim_state(sim)
+                    if restored != state:
+                        error = f"restore of frame {saved_frame} at frame {frame}: {', '.join(state_diff(state, restored))}"
+                        break
+                    if entry is current:
+                        break
+                    act = POLICIES[rng.choice(CLIMB_POLICIES)](rng)
+                    for _ in range(rng.randint(*ROLLBACK_RUN)):
+                        if sim.game_over:
+                            break
+                        sim.step(act(sim))
+                if error:
+                    break
+            sim.step(inputs)
+        if error is None:
+            expected = sim_state(icy_tower.replay(seed, difficulty, input_log))
+            actual = sim_state(sim)
+            if actual != expected:
+                error = ", ".join(state_diff(expected, actual))
+        if error:
+            failures.append(f"{label}: {error}")
+    return failures
+
+CHECKS = {
+    "fast_forward": check_fast_forward,
+    "batched_env": check_batched_env,
+    "rollback": check_rollback,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Porównanie szybkich ścieżek symulacji z Simulation.step")
+    parser.add_argument("--runs", type=int, default=300, help="losowych przebiegów na sprawdzenie")
+    parser.add_argument("--frames", type=int, default=3000, help="najdłuższy przebieg w klatkach")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno losowania przebiegów")
+    parser.add_argument("--only", choices=sorted(CHECKS), action="append", help="uruchom tylko wybrane sprawdzenia")
+    args = parser.parse_args()
+
+    failed = 0
+    for name in args.only or CHECKS:
+        start = time.perf_counter()
+        failures = CHECKS[name](random.Random(f"{args.seed}/{name}"), args.runs, args.frames)
+        elapsed = time.perf_counter() - start
+        for failure in failures:
+            print(f"FAIL  {name}: {failure}")
+        status = "FAIL" if failures else "OK  "
+        print(f"{status}  {name}: {args.runs - len(failures)} of {args.runs} runs match ({elapsed:.1f} s)")
+        failed += len(failures)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from icy_tower import WIDTH
+
+EFFECTS_CAPACITY = 2048
+# Czas na efekty w jednej klatce (aktualizacja + rysowanie), w sekundach
+EFFECTS_BUDGET = 0.0015
+EFFECTS_MIN_QUALITY = 0.1
+FADE_LEVELS = 8
+
+# Rodzaje cząsteczek. Prędkości w pikselach na sekundę, "spread" to rozrzut
+# pozycji startowej, "speed" rozrzut prędkości wokół prędkości bazowej.
+EFFECT_KINDS = [
+    {"name": "dust", "color": (210, 210, 220), "radius": 3, "life": 0.45, "gravity": 500.0,
+     "spread": (12, 2), "speed": (90, 40)},
+    {"name": "spark", "color": (255, 215, 0), "radius": 2, "life": 0.6, "gravity": 250.0,
+     "spread": (6, 6), "speed": (140, 140)},
+    {"name": "trail", "color": (255, 100, 255), "radius": 4, "life": 0.35, "gravity": 0.0,
+     "spread": (10, 4), "speed": (20, 20)},
+    {"name": "ember", "color": (255, 140, 0), "radius": 2, "life": 1.2, "gravity": -60.0,
+     "spread": (WIDTH // 2, 2), "speed": (30, 30)},
+]
+KIND_INDEX = {kind["name"]: i for i, kind in enumerate(EFFECT_KINDS)}
+SPRITE_SIZE = 2 * max(kind["radius"] for kind in EFFECT_KINDS) + 1
+SPRITE_HALF = SPRITE_SIZE // 2
+
+# Żar nad lawą i smuga hiper skoku - cząsteczek na sekundę
+EMBER_RATE = 40.0
+TRAIL_RATE = 120.0
+
+# Wiersze tablicy cząsteczek
+X, Y, VX, VY, GRAVITY, AGE, LIFE, SPRITE = range(8)
+FIELDS = 8
+
+# Efekty cząsteczkowe na tablicach NumPy o stałej pojemności. Żywe cząsteczki
+# zajmują kolumny [0, count) jednej tablicy pól; aktualizacja to kilka operacji
+# na całych wierszach, a martwe cząsteczki są usuwane przez compress do drugiej
+# tablicy, po czym tablice zamieniają się rolami. Wszystkie bufory są
+# przydzielane raz - co klatkę powstaje tylko lista argumentów Surface.blits.
+# Rysowanie to jedno blits z gotowych sprite'ów (kolor x poziom zanikania).
+# Gdy efekty przekraczają budżet czasu klatki, spada "quality": mniej nowych
+# cząsteczek i niższy limit żywych (najstarsze są usuwane). Pod budżetem
+# jakość powoli wraca do pełnej.
+class ParticleSystem:
+    def __init__(self, capacity=EFFECTS_CAPACITY, budget=EFFECTS_BUDGET, seed=None):
+        self.capacity = capacity
+        self.budget = budget
+        self.data = np.zeros((FIELDS, capacity), dtype=np.float32)
+        self.spare = np.zeros_like(self.data)
+        self.scratch = np.zeros(capacity, dtype=np.float32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.sprite_index = np.zeros(capacity, dtype=np.intp)
+        self.positions = np.zeros((capacity, 2), dtype=np.intp)
+        self.count = 0
+        # Własny generator - efekty nie ruszają losowania symulacji
+        self.rng = np.random.default_rng(seed)
+        self.dt = 0.0
+        self.quality = 1.0
+        self.frame_time = 0.0
+        self.sprites = None
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+        self.quality = 1.0
+        self.frame_time = 0.0
+
+    def emit(self, kind, x, y, count, vx=0.0, vy=0.0):
+        # Ułamkowa liczba cząsteczek zaokrąglana losowo - przy małym dt też coś powstaje
+        count *= self.quality
+        whole = int(count)
+        if self.rng.random() < count - whole:
+            whole += 1
+        start = self.count
+        count = min(whole, int(self.capacity * self.quality) - start)
+        if count <= 0:
+            return
+        end = start + count
+        info = EFFECT_KINDS[KIND_INDEX[kind]]
+        spread_x, spread_y = info["spread"]
+        speed_x, speed_y = info["speed"]
+        d = self.data[:, start:end]
+        random_row = self.rng.random
+        for row, center, spread in ((X, x, spread_x), (Y, y, spread_y), (VX, vx, speed_x), (VY, vy, speed_y)):
+            random_row(dtype=np.float32, out=d[row])
+            d[row] *= 2 * spread
+            d[row] += center - spread
+        # Czas życia 60-100% nominalnego
+        random_row(dtype=np.float32, out=d[LIFE])
+        d[LIFE] *= 0.4 * info["life"]
+        d[LIFE] += 0.6 * info["life"]
+        d[AGE] = 0.0
+        d[GRAVITY] = info["gravity"]
+        d[SPRITE] = KIND_INDEX[kind] * FADE_LEVELS
+        self.count = end
+
+    def update(self, dt, player=None):
+        start = time.perf_counter()
+        # Budżet rozliczany za poprzednią klatkę (aktualizacja + rysowanie)
+        if self.frame_time > self.budget:
+            self.quality = max(EFFECTS_MIN_QUALITY, self.quality * 0.75)
+        elif self.quality < 1.0:
+            self.quality = min(1.0, self.quality + 0.01)
+        self.frame_time = 0.0
+        self.dt = dt
+
+        if player is not None and player.character_state == "hyper" and dt > 0:
+            self.emit("trail", player.x + player.width / 2, player.y + player.height / 2, TRAIL_RATE * dt)
+
+        n = self.count
+        if n and dt > 0:
+            d = self.data[:, :n]
+            tmp = self.scratch[:n]
+            d[AGE] += dt
+            np.multiply(d[GRAVITY], dt, out=tmp)
+            d[VY] += tmp
+            np.multiply(d[VX], dt, out=tmp)
+            d[X] += tmp
+            np.multiply(d[VY], dt, out=tmp)
+            d[Y] += tmp
+
+            # Ponad limit przy obniżonej jakości - najstarsze (z początku) idą pierwsze
+            excess = n - int(self.capacity * self.quality)
+            if excess > 0:
+                d[AGE, :excess] = d[LIFE, :excess]
+
+            alive = self.alive[:n]
+            np.less(d[AGE], d[LIFE], out=alive)
+            kept = int(np.count_nonzero(alive))
+            if kept < n:
+                np.compress(alive, d, axis=1, out=self.spare[:, :kept])
+                self.data, self.spare = self.spare, self.data
+                self.count = kept
+        self.frame_time += time.perf_counter() - start
+
+    def lava(self, lava_y):
+        # Żar unoszący się z powierzchni lawy (wywoływane z Lava.draw)
+        self.emit("ember", WIDTH / 2, lava_y, EMBER_RATE * self.dt, vy=-50.0)
+
+    def build_sprites(self):
+        # Kółko każdego rodzaju w FADE_LEVELS poziomach przezroczystości, wyśrodkowane w SPRITE_SIZE
+        sprites = []
+        for kind in EFFECT_KINDS:
+            for level in range(FADE_LEVELS):
+                sprite = pygame.Surface((SPRITE_SIZE, SPRITE_SIZE), pygame.SRCALPHA)
+                alpha = int(255 * (1 - level / FADE_LEVELS))
+                pygame.draw.circle(sprite, kind["color"] + (alpha,), (SPRITE_HALF, SPRITE_HALF), kind["radius"])
+                sprites.append(sprite.convert_alpha())
+        return sprites
+
+    def draw(self, surface, camera_y):
+        # Zwraca prostokąt obejmujący narysowane cząsteczki (dla DirtyRects) albo None
+        n = self.count
+        if not n:
+            return None
+        start = time.perf_counter()
+        if self.sprites is None:
+            self.sprites = self.build_sprites()
+        d = self.data[:, :n]
+        tmp = self.scratch[:n]
+        np.divide(d[AGE], d[LIFE], out=tmp)
+        tmp *= FADE_LEVELS
+        np.minimum(tmp, FADE_LEVELS - 1, out=tmp)
+        tmp += d[SPRITE]
+        index = self.sprite_index[:n]
+        np.copyto(index, tmp, casting="unsafe")
+        positions = self.positions[:n]
+        np.copyto(positions[:, 0], d[X], casting="unsafe")
+        np.copyto(positions[:, 1], d[Y], casting="unsafe")
+        positions[:, 0] -= SPRITE_HALF
+        positions[:, 1] -= int(camera_y) + SPRITE_HALF
+
+        surface.blits(zip(map(self.sprites.__getitem__, index.tolist()), positions.tolist()), doreturn=False)
+
+        left, top = positions.min(axis=0).tolist()
+        right, bottom = positions.max(axis=0).tolist()
+        self.frame_time += time.perf_counter() - start
+        return pygame.Rect(left, top, right - left + SPRITE_SIZE, bottom - top + SPRITE_SIZE)
@@ -0,0 +1,288 @@
+import os
+import re
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from icy_tower import (WIDTH, HEIGHT, CAMERA_SPEED, CAMERA_FOLLOW_HEIGHT, COIN_PICKUP_RADIUS,
+                       SPIKE_HIT_RANGE, Simulation)
+
+NEVER = float('inf')
+
+# Przewijanie bez klatek. Gracz stojący bez wejścia na platformie, przy
+# nieruchomej kamerze, to punkt stały Player.update - zmienia się tylko ruch
+# platform (liczby całkowite, stała prędkość między odbiciami), lawa i zanik
+# vel_x. Takie odcinki są przeskakiwane od razu do najbliższego zdarzenia:
+# zmiany podparcia lub kolców pod graczem, zebrania monety z ruchomej
+# platformy, dotknięcia lawy albo końca odcinka bez wejścia. Klatka zdarzenia
+# liczona jest zwykłym Simulation.step, więc stan zgadza się z nim co do bitu.
+
+# Liczba kroków Platform.update do najbliższego odbicia (z krokiem odbicia)
+def platform_leg(x, vel_x, left, right):
+    if vel_x > 0:
+        if x + vel_x <= left:
+            return 1
+        return max(1, -((x - right) // vel_x))
+    if x + vel_x >= right:
+        return 1
+    return max(1, -((left - x) // -vel_x))
+
+def bounce(x, vel_x, steps, left, right):
+    return min(max(x + steps * vel_x, left), right), -vel_x
+
+# Stan ruchomej platformy po n krokach Platform.update, z pominięciem pełnych cykli ruchu
+def platform_after(platform, n):
+    x = platform.x
+    vel_x = platform.vel_x
+    left = platform.left_limit
+    right = platform.right_limit
+    seen = {}
+    while n > 0:
+        steps = platform_leg(x, vel_x, left, right)
+        if steps > n:
+            return x + n * vel_x, vel_x
+        x, vel_x = bounce(x, vel_x, steps, left, right)
+        n -= steps
+        state = (x, vel_x)
+        if state in seen:
+            n %= seen[state] - n
+            seen.clear()
+        else:
+            seen[state] = n
+    return x, vel_x
+
+# Pierwszy krok (liczony od 1), w którym signature(x platformy) różni się od
+# obecnej. Na odcinku bez odbicia x jest monotoniczne, a signature składa się
+# z testów, które zmieniają się tam co najwyżej raz, więc wystarczy bisekcja.
+def first_change(platform, signature):
+    x = platform.x
+    vel_x = platform.vel_x
+    left = platform.left_limit
+    right = platform.right_limit
+    base = signature(x)
+    frame = 0
+    seen = set()
+    while True:
+        steps = platform_leg(x, vel_x, left, right)
+        if steps > 1 and signature(x + (steps - 1) * vel_x) != base:
+            lo, hi = 1, steps - 1
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if signature(x + mid * vel_x) != base:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            return frame + lo
+        x, vel_x = bounce(x, vel_x, steps, left, right)
+        frame += steps
+        if signature(x) != base:
+            return frame
+        # Cały cykl ruchu bez zmiany - zmiana nigdy nie nastąpi
+        if (x, vel_x) in seen:
+            return NEVER
+        seen.add((x, vel_x))
+
+def analytic_platform(platform):
+    return (type(platform.x) is int and type(platform.vel_x) is int and platform.vel_x != 0
+            and platform.left_limit <= platform.x <= platform.right_limit)
+
+# Testy podparcia (te same wyrażenia co w Player.update) dla platformy pod stopami
+def support_signature(player, platform):
+    x = player.x
+    width = player.width
+    center_x = x + width / 2
+    platform_width = platform.width
+    spike_offset = platform.spike_offset
+    has_spikes = platform.has_spikes
+
+    def signature(platform_x):
+        overlap = (x + width > platform_x, x < platform_x + platform_width)
+        if not has_spikes:
+            return overlap
+        spike_dx = center_x - (platform_x + spike_offset)
+        return overlap + (spike_dx < SPIKE_HIT_RANGE, spike_dx > -SPIKE_HIT_RANGE)
+    return signature
+
+# Test zebrania monety (jak w Platform.check_coin_collection) z podziałem na
+# stronę, po której jest moneta - po każdej stronie test jest monotoniczny
+def coin_signature(player, platform):
+    center_x = player.x + player.width / 2
+    dy = player.y + player.height / 2 - (platform.y - 30)
+    dy2 = dy * dy
+    half_width = platform.width / 2
+    radius2 = COIN_PICKUP_RADIUS * COIN_PICKUP_RADIUS
+
+    def signature(platform_x):
+        dx = center_x - (platform_x + half_width)
+        return dx > 0, dx * dx + dy2 < radius2
+    return signature
+
+# Platformy, które Player.update sprawdza pod stojącym graczem, i ta, na której stoi
+def support_platforms(player, platforms):
+    feet = player.y + player.height
+    return platforms.between(feet, feet + player.gravity)
+
+def support_platform(player, support):
+    for platform in support:
+        if player.x + player.width > platform.x and player.x < platform.x + platform.width:
+            return platform
+    return None
+
+# Liczba klatek bez wejścia, które można przeskoczyć analitycznie (najwyżej limit)
+def idle_frames(sim, limit):
+    player = sim.player
+    lava = sim.lava
+    if sim.game_over or limit <= 0 or sim.profiler is not None:
+        return 0
+    if not player.on_ground or player.vel_y != 0 or player.jump_cooldown or player.hyper_jump_effect_time:
+        return 0
+    if player.coins >= player.max_coins and player.character_state == "normal":
+        return 0
+    if player.first_jump_made and sim.difficulty != "No Lava" and not lava.active:
+        return 0
+
+    # Pozycja x nie może się już ruszyć - coraz mniejsze vel_x tylko się zaokrągla
+    x = player.x
+    if max(0, min(x + player.vel_x, WIDTH - player.width)) != x:
+        return 0
+
+    # Kamera w punkcie stałym swojego przybliżania
+    target = sim.target_camera_y
+    if player.y < sim.camera_y + HEIGHT * CAMERA_FOLLOW_HEIGHT:
+        target = player.y - HEIGHT * CAMERA_FOLLOW_HEIGHT
+    camera_y = sim.camera_y
+    if target != sim.target_camera_y or camera_y + (target - camera_y) * CAMERA_SPEED != camera_y:
+        return 0
+    if player.y > camera_y + HEIGHT:
+        return 0
+
+    # Przy stałej kamerze nic nie odpada z dołu i nic nie dochodzi na górze
+    platforms = sim.platforms
+    if len(platforms) < sim.live_platforms or next(iter(platforms)).y >= camera_y + HEIGHT + 200:
+        return 0
+
+    support = support_platforms(player, platforms)
+    standing_on = support_platform(player, support)
+    if standing_on is None or standing_on.y < player.highest_platform:
+        return 0
+    if standing_on.has_spikes and abs(x + player.width / 2 - (standing_on.x + standing_on.spike_offset)) < SPIKE_HIT_RANGE:
+        return 0
+
+    moving = [p for p in platforms if p.is_moving]
+    if not all(analytic_platform(p) for p in moving):
+        return 0
+
+    event = limit + 1
+    for platform in support:
+        if platform.is_moving:
+            event = min(event, first_change(platform, support_signature(player, platform)))
+
+    coin_y = player.y + player.height / 2 + 30
+    for platform in platforms.between(coin_y - COIN_PICKUP_RADIUS, coin_y + COIN_PICKUP_RADIUS):
+        if not platform.has_coin or platform.coin_collected:
+            continue
+        signature = coin_signature(player, platform)
+        if signature(platform.x)[1]:
+            return 0
+        if platform.is_moving:
+            event = min(event, first_change(platform, signature))
+
+    feet = player.y + player.height
+    if not lava.active:
+        if feet > lava.height:
+            return 0
+    else:
+        height = lava.height
+        speed = lava.rise_speed
+        if not (float(height).is_integer() and float(speed).is_integer()) or abs(height) >= 2 ** 52:
+            return 0
+        if speed > 0:
+            # Pierwsza klatka n, w której feet > height - n * speed (dokładne na liczbach całkowitych)
+            n = max(1, int((height - feet) // speed) + 1)
+            while n > 1 and feet > height - (n - 1) * speed:
+                n -= 1
+            while not feet > height - n * speed:
+                n += 1
+            event = min(event, n)
+        elif feet > height:
+            return 0
+
+    return min(limit, event - 1)
+
+# Przeskok n klatek bez wejścia; stan jak po n wywołaniach sim.step(0)
+def skip_idle(sim, n):
+    if n <= 0:
+        return
+    player = sim.player
+    lava = sim.lava
+    platforms = sim.platforms
+
+    # Ostatnia klatka zwykłym Platform.update - ustawia też prev_x
+    for platform in platforms:
+        if platform.is_moving:
+            platform.x, platform.vel_x = platform_after(platform, n - 1)
+            platform.update()
+
+    if lava.active:
+        lava.height -= (n - 1) * lava.rise_speed
+        lava.update()
+    else:
+        lava.prev_height = lava.height
+
+    standing_on = support_platform(player, support_platforms(player, platforms))
+    # Zanik vel_x. Wartość x się nie zmienia, ale przy ścianie może przejść z int
+    # na float, więc ostatnie klatki liczone są tak jak w Player.update
+    right = WIDTH - player.width
+    x = player.x
+    prev_x = player.prev_x
+    vel_x = player.vel_x
+    for _ in range(n):
+        prev_x = x
+        x = max(0, min(x + vel_x, right))
+        settled = vel_x * 0.9 == vel_x
+        vel_x *= 0.9
+        if settled and type(prev_x) is type(x):
+            break
+    player.vel_x = vel_x
+    player.x = x
+    player.prev_x = prev_x
+    player.prev_y = player.y
+    # Player.update liczy screen_y przed osadzeniem gracza z powrotem na platformie
+    player.screen_y = player.y + player.gravity - sim.camera_y
+    player.on_ground = True
+    player.on_slippery = standing_on.is_slippery
+    player.last_platform_slippery = standing_on.is_slippery
+    player.hit_by_spike = False
+
+    sim.prev_camera_y = sim.camera_y
+    sim.input_log.extend(bytes(n))
+    sim.score = player.score
+    sim.frame += n
+
+# Pozycje kolejnych niezerowych bajtów - granice odcinków bez wejścia
+NONZERO = re.compile(b"[^\x00]")
+
+def run_inputs(sim, input_log):
+    # Jak sim.step dla każdego bajtu, z przeskakiwaniem odcinków bez wejścia
+    end = len(input_log)
+    frame = 0
+    idle_end = 0
+    while frame < end:
+        if sim.game_over:
+            raise ValueError(f"game ended at frame {frame} of {end}")
+        inputs = input_log[frame]
+        if inputs == 0:
+            if frame >= idle_end:
+                match = NONZERO.search(input_log, frame)
+                idle_end = match.start() if match else end
+            skipped = idle_frames(sim, idle_end - frame)
+            if skipped:
+                skip_idle(sim, skipped)
+                frame += skipped
+                continue
+        sim.step(inputs)
+        frame += 1
+    return sim
+
+def replay(seed, difficulty, input_log):
+    # Odpowiednik icy_tower.replay z przewijaniem bezczynnych odcinków
+    return run_inputs(Simulation(difficulty, seed=seed), bytes(input_log))
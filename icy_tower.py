@@ -2,9 +2,19 @@ import pygame
 import sys
 import random
 import math
-
-# Inicjalizacja PyGame
-pygame.init()
+import os
+import struct
+import zlib
+import time
+import copy
+import gc
+import tracemalloc
+import threading
+import queue
+import argparse
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from collections import OrderedDict, deque
 
 # Stałe gry
 WIDTH = 800
@@ -14,12 +24,37 @@ PLAYER_HEIGHT = 50
 PLATFORM_HEIGHT = 10
 COIN_CHANCE = 0.2 
 SPIKE_HIT_RANGE = 15
+COIN_PICKUP_RADIUS = 28
+LIVE_PLATFORMS = 30
 CAMERA_SPEED = 0.1
 CAMERA_FOLLOW_HEIGHT = 0.4 
+DIRTY_RECT_UPDATES = True
+
+# Fizyka liczona w stałych krokach niezależnie od częstotliwości rysowania.
+# Między krokami pozycje są interpolowane, a przy przeciążeniu gubione są
+# klatki obrazu, nie kroki symulacji (do MAX_TICKS_PER_FRAME na klatkę).
+TICK_RATE = 60
+TICK_TIME = 1.0 / TICK_RATE
+MAX_TICKS_PER_FRAME = 5
+RENDER_FPS = 144  # 0 - bez limitu
+
+# Ustawienia ekranu (okno tworzone dopiero w init_display)
+screen = None
+
+# Efekty cząsteczkowe (effects.ParticleSystem) - włączane w main, gdy jest
+# NumPy. Symulacja tylko zgłasza zdarzenia, efekty nie wpływają na przebieg.
+effects = None
+LANDING_DUST_SPEED = 4
 
-# Ustawienia ekranu
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Icy Tower Clone")
+# PyGame inicjalizowany dopiero przy tworzeniu okna - sam import modułu jest
+# tani dla narzędzi i procesów roboczych, które potrzebują tylko symulacji
+def init_display():
+    global screen
+    if screen is None:
+        pygame.init()
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Icy Tower Clone")
+    return screen
 
 # Kolory 
 COLORS = {
@@ -98,9 +133,22 @@ PLATFORM_TYPES = {
     "SLIPPERY": {"range": (0.4, 0.6), "color": (100, 200, 255)}
 }
 
+# Kolory gracza w zależności od stanu
+PLAYER_COLORS = {
+    "normal": COLORS['RED'],
+    "charged": COLORS['GOLD'],
+    "ready": COLORS['READY'],
+    "hyper": COLORS['PURPLE']
+}
+
 # Ustawienia gracza
 class Player:
-    def __init__(self):
+    def __init__(self, rng=random):
+        # Generator losowy (moduł random albo random.Random danego przebiegu)
+        self.rng = rng
+        # Liczba losowań w grze - przy własnym generatorze przebiegu wyznacza jego stan
+        self.rng_draws = 0
+        
         # Podstawowe atrybuty
         self.width = PLAYER_WIDTH
         self.height = PLAYER_HEIGHT
@@ -125,6 +173,7 @@ class Player:
         self.score = 0
         self.highest_platform = 0
         self.screen_y = self.y
+        self.prev_x = self.x
         self.prev_y = self.y
         self.current_region = 0
         
@@ -139,6 +188,7 @@ class Player:
         self.character_state = "normal"
 
     def update(self, platforms, camera_y, lava_height):
+        self.prev_x = self.x
         self.prev_y = self.y
         
         # Aktualizacja fizyki
@@ -159,20 +209,26 @@ class Player:
         self.on_slippery = False
         self.hit_by_spike = False
         
-        # Kolizje z platformami
-        for platform in platforms:
-            if (self.y + self.height >= platform.y and 
-                self.prev_y + self.height <= platform.y and 
-                self.x + self.width > platform.x and 
-                self.x < platform.x + platform.width and 
-                self.vel_y > 0):
+        # Kolizje z platformami - tylko te w pionowym zakresie ruchu [prev_y, y]
+        if self.vel_y > 0:
+            landing_candidates = platforms.between(self.prev_y + self.height, self.y + self.height)
+        else:
+            landing_candidates = ()
+        for platform in landing_candidates:
+            if (self.x + self.width > platform.x and 
+                self.x < platform.x + platform.width):
                 
                 if platform.has_spikes:
                     player_center_x = self.x + self.width / 2
                     spike_x = platform.x + platform.spike_offset
                     if abs(player_center_x - spike_x) < 15:
+                        self.hit_by_spike = True
                         return False
                 
+                # Kurz przy lądowaniu z wyskoku (stojący gracz "ląduje" co klatkę z vel_y = gravity)
+                if effects is not None and self.vel_y > LANDING_DUST_SPEED:
+                    effects.emit("dust", self.x + self.width / 2, platform.y, self.vel_y / 2)
+                
                 self.y = platform.y - self.height
                 self.vel_y = 0
                 self.on_ground = True
@@ -210,8 +266,9 @@ class Player:
             
             if self.on_slippery:
                 jump_force *= 1.2  
-                direction = 1 if random.random() > 0.5 else -1
-                self.vel_x += direction * random.uniform(8.0, 12.0)  
+                direction = 1 if self.rng.random() > 0.5 else -1
+                self.vel_x += direction * self.rng.uniform(8.0, 12.0)  
+                self.rng_draws += 1
             
             if self.hyper_jump_active and self.hyper_jump_charges > 0:
                 self.hyper_jump_charges -= 1
@@ -219,6 +276,11 @@ class Player:
                 self.hyper_jump_effect_time = 30
                 self.character_state = "hyper"
                 self.coins = 0
+                if effects is not None:
+                    effects.emit("trail", self.x + self.width / 2, self.y + self.height, 30, vy=100.0)
+            
+            if effects is not None:
+                effects.emit("dust", self.x + self.width / 2, self.y + self.height, 6)
             
             self.vel_y = jump_force
             self.on_ground = False
@@ -233,42 +295,52 @@ class Player:
             return True
         return False
 
-    def draw(self, camera_y):
+    def render_position(self, alpha):
+        # Pozycja między poprzednim a bieżącym krokiem fizyki (alpha = 1 to dokładnie bieżąca)
+        back = 1.0 - alpha
+        return self.x - (self.x - self.prev_x) * back, self.y - (self.y - self.prev_y) * back
+
+    def draw(self, camera_y, alpha=1.0):
+        x, y = self.render_position(alpha)
+        
         # Wybierz kolor gracza na podstawie stanu
-        player_colors = {
-            "normal": COLORS['RED'],
-            "charged": COLORS['GOLD'],
-            "ready": COLORS['READY'], 
-            "hyper": COLORS['PURPLE']
-        }
-        player_color = player_colors[self.character_state]
+        player_color = PLAYER_COLORS[self.character_state]
         
         # Rysuj postać
-        pygame.draw.rect(screen, player_color, (self.x, self.y - camera_y, self.width, self.height))
+        pygame.draw.rect(screen, player_color, (x, y - camera_y, self.width, self.height))
         
         # Oczy
-        pygame.draw.rect(screen, COLORS['WHITE'], (self.x + 5, self.y - camera_y + 10, 5, 5))
-        pygame.draw.rect(screen, COLORS['WHITE'], (self.x + 20, self.y - camera_y + 10, 5, 5))
+        pygame.draw.rect(screen, COLORS['WHITE'], (x + 5, y - camera_y + 10, 5, 5))
+        pygame.draw.rect(screen, COLORS['WHITE'], (x + 20, y - camera_y + 10, 5, 5))
         
         # Efekty specjalne dla charged/hyper stanu
         if self.character_state == "charged":
             # Strzałka nad głową
             pygame.draw.polygon(screen, COLORS['GOLD'], [
-                (self.x + self.width // 2, self.y - camera_y - 20),
-                (self.x + self.width // 2 - 10, self.y - camera_y - 10),
-                (self.x + self.width // 2 + 10, self.y - camera_y - 10)
+                (x + self.width // 2, y - camera_y - 20),
+                (x + self.width // 2 - 10, y - camera_y - 10),
+                (x + self.width // 2 + 10, y - camera_y - 10)
             ])
         elif self.character_state == "hyper":
             # Efekt prędkości
             pygame.draw.polygon(screen, COLORS['PURPLE'], [
-                (self.x + 5, self.y - camera_y + self.height),
-                (self.x + self.width - 5, self.y - camera_y + self.height),
-                (self.x + self.width // 2, self.y - camera_y + self.height + 15)
+                (x + 5, y - camera_y + self.height),
+                (x + self.width - 5, y - camera_y + self.height),
+                (x + self.width // 2, y - camera_y + self.height + 15)
             ])
 
 # Ustawienia platform
 class Platform:
-    def __init__(self, x, y, width, region=0):
+    # Stały zestaw pól zamiast __dict__ - mniej pamięci i szybszy dostęp w pętlach
+    # kolizji i ruchu. Pola ruchomych/śliskich platform mają wartości domyślne.
+    __slots__ = (
+        "x", "y", "width", "height", "region", "vertical_gap",
+        "has_coin", "coin_collected", "coin_animation_offset",
+        "is_moving", "is_slippery", "has_spikes", "spike_offset", "color", "sprite_key",
+        "vel_x", "move_range", "start_x", "left_limit", "right_limit", "shine_positions", "prev_x",
+    )
+
+    def __init__(self, x, y, width, region=0, rng=random):
         self.x = x
         self.y = y
         self.width = width
@@ -279,7 +351,7 @@ class Platform:
         # Właściwości platformy
         self.has_coin = False
         self.coin_collected = False
-        self.coin_animation_offset = random.random() * 6.28
+        self.coin_animation_offset = rng.random() * 6.28
         
         # Domyślne wartości
         self.is_moving = False
@@ -287,83 +359,130 @@ class Platform:
         self.has_spikes = False
         self.spike_offset = 0  
         self.color = COLORS['BLUE']
+        self.sprite_key = None
+        
+        # Ruch i błyski - używane tylko przez ruchome i śliskie platformy
+        self.vel_x = 0
+        self.move_range = 0
+        self.start_x = x
+        self.left_limit = x
+        self.right_limit = x
+        self.shine_positions = ()
+        self.prev_x = x
         
         # Ustawienia platformy na podstawie regionu
-        region_data = REGIONS[region]["platform_types"]
+        region_info = REGIONS[region]
+        region_data = region_info["platform_types"]
         
         # Losowanie typu platformy (normalna/ruchoma/śliska)
-        rand_val = random.random()
+        rand_val = rng.random()
         if rand_val < region_data["moving"]:
             self.is_moving = True
             self.color = (50, 200, 50)
-            self.vel_x = random.choice(REGIONS[region]["platform_speed"])
-            self.move_range = random.randint(100, 200)
-            self.start_x = x
+            self.vel_x = rng.choice(region_info["platform_speed"])
+            self.move_range = rng.randint(100, 200)
             self.left_limit = max(0, self.start_x - self.move_range)
             self.right_limit = min(WIDTH - self.width, self.start_x + self.move_range)
         elif rand_val < region_data["moving"] + region_data["slippery"]:
             self.is_slippery = True
             self.color = (100, 200, 255)
-            self.shine_positions = [random.randint(int(x + 10), int(x + width - 10)) for _ in range(3)]
+            self.shine_positions = tuple(rng.randint(int(x + 10), int(x + width - 10)) for _ in range(3))
             
         # Niezależne losowanie kolców
-        if random.random() < region_data["spikes"]:
+        if rng.random() < region_data["spikes"]:
             self.has_spikes = True
             self.spike_offset = width // 2  
             
         # Losowanie monety
-        if not self.has_spikes and random.random() < COIN_CHANCE:
+        if not self.has_spikes and rng.random() < COIN_CHANCE:
             self.has_coin = True
 
+    @classmethod
+    def from_rolls(cls, x, y, width, region, coin_animation_offset, is_moving=False, is_slippery=False,
+                   has_spikes=False, has_coin=False, vel_x=0, move_range=0, shine_positions=()):
+        # Platforma z gotowych wyników losowań (platform_batch), bez generatora.
+        # Ustawia każde pole z __slots__ tak jak __init__ - nowe pole trzeba
+        # dopisać w obu miejscach.
+        platform = cls.__new__(cls)
+        platform.x = platform.start_x = platform.prev_x = x
+        platform.y = y
+        platform.width = width
+        platform.height = PLATFORM_HEIGHT
+        platform.region = region
+        platform.vertical_gap = 0
+        platform.has_coin = has_coin
+        platform.coin_collected = False
+        platform.coin_animation_offset = coin_animation_offset
+        platform.is_moving = is_moving
+        platform.is_slippery = is_slippery
+        platform.has_spikes = has_spikes
+        platform.spike_offset = width // 2 if has_spikes else 0
+        platform.sprite_key = None
+        platform.vel_x = vel_x
+        platform.move_range = move_range
+        platform.shine_positions = shine_positions
+        platform.left_limit = platform.right_limit = x
+        if is_moving:
+            platform.color = (50, 200, 50)
+            platform.left_limit = max(0, x - move_range)
+            platform.right_limit = min(WIDTH - width, x + move_range)
+        elif is_slippery:
+            platform.color = (100, 200, 255)
+        else:
+            platform.color = COLORS['BLUE']
+        return platform
+
     def update(self):
         if self.is_moving:
+            self.prev_x = self.x
             self.x += self.vel_x
             if (self.x >= self.right_limit) or (self.x <= self.left_limit):
                 self.vel_x *= -1
                 self.x = min(max(self.x, self.left_limit), self.right_limit)
                 
-    def draw(self, camera_y):
-        # Rysuj podstawową platformę
-        platform_rect = pygame.Rect(self.x, self.y - camera_y, self.width, self.height)
-        pygame.draw.rect(screen, self.color, platform_rect)
-        pygame.draw.rect(screen, COLORS['WHITE'], platform_rect, 1)
-        
-        # Rysowanie kolców jeśli są 
-        if self.has_spikes:
-            spike_x = self.x + self.spike_offset
-            pygame.draw.polygon(screen, (200, 50, 50), [
-                (spike_x, self.y - camera_y - 10),
-                (spike_x - 5, self.y - camera_y),
-                (spike_x + 5, self.y - camera_y)
-            ])
-        
-        # Rysowanie monet jeśli są
-        if self.has_coin and not self.coin_collected:
-            coin_x = self.x + self.width / 2
-            coin_y = self.y - 30 + math.sin(pygame.time.get_ticks() / 1000.0 * 2 + self.coin_animation_offset) * 1.5
-            pygame.draw.circle(screen, COLORS['GOLD'], (int(coin_x), int(coin_y - camera_y)), 8)
-            pygame.draw.circle(screen, (255, 235, 100), (int(coin_x), int(coin_y - camera_y)), 5)
+    def get_sprite_key(self):
+        # Klucz sprite'a liczony przy pierwszym rysowaniu (kolor może być zmieniony po utworzeniu)
+        if self.sprite_key is None:
+            shine_offsets = tuple(shine_x - self.x for shine_x in self.shine_positions)
+            self.sprite_key = ("platform", self.width, self.is_moving, self.color, self.has_spikes, shine_offsets)
+        return self.sprite_key
+
+    def render_x(self, alpha):
+        if not self.is_moving:
+            return self.x
+        return self.x - (self.x - self.prev_x) * (1.0 - alpha)
+
+    def draw(self, camera_y, alpha=1.0):
+        # Platforma z kolcami i błyskami jako jeden gotowy sprite
+        x = self.render_x(alpha)
+        screen_y = self.y - camera_y
+        screen.blit(render_cache.platform_sprite(self), (x, screen_y - SPIKE_SPRITE_HEIGHT))
+        self.draw_coin(x, camera_y)
         
         # Rysowanie wskaźniki dla ruchomej platformy
         if self.is_moving:
             pygame.draw.line(screen, COLORS['YELLOW'], 
-                (self.left_limit, self.y - camera_y + self.height/2),
-                (self.right_limit + self.width, self.y - camera_y + self.height/2), 1)
-        
-        # Rysowanie błysków dla śliskiej platformy
-        if self.is_slippery:
-            for shine_x in self.shine_positions:
-                pygame.draw.circle(screen, COLORS['WHITE'], (shine_x, self.y - camera_y + 5), 2)
+                (self.left_limit, screen_y + self.height/2),
+                (self.right_limit + self.width, screen_y + self.height/2), 1)
+
+    def draw_coin(self, x, camera_y):
+        # Rysowanie monet jeśli są
+        if self.has_coin and not self.coin_collected:
+            coin_x = x + self.width / 2
+            coin_y = self.y - 30 + math.sin(pygame.time.get_ticks() / 1000.0 * 2 + self.coin_animation_offset) * 1.5
+            screen.blit(render_cache.coin_sprite(), (int(coin_x) - COIN_SPRITE_RADIUS, int(coin_y - camera_y) - COIN_SPRITE_RADIUS))
 
     def check_coin_collection(self, player):
         if self.has_coin and not self.coin_collected:
             coin_x = self.x + self.width / 2
             coin_y = self.y - 30
-            player_center = (player.x + player.width / 2, player.y + player.height / 2)
-            distance = ((player_center[0] - coin_x) ** 2 + (player_center[1] - coin_y) ** 2) ** 0.5
+            dx = player.x + player.width / 2 - coin_x
+            dy = player.y + player.height / 2 - coin_y
             
-            if distance < 28:
+            if dx * dx + dy * dy < COIN_PICKUP_RADIUS * COIN_PICKUP_RADIUS:
                 self.coin_collected = True
+                if effects is not None:
+                    effects.emit("spark", coin_x, coin_y, 16)
                 if player.coins < player.max_coins:
                     player.coins += 1
                     if player.coins >= player.max_coins:
@@ -376,40 +495,274 @@ class Platform:
 class Lava:
     def __init__(self, initial_height):
         self.height = initial_height
+        self.prev_height = initial_height
         self.rise_speed = 1.8
         self.active = False
         
     def update(self):
+        self.prev_height = self.height
         if self.active:
             self.height -= self.rise_speed
+    
+    def render_height(self, alpha):
+        # Lawa bez ruchu (też nieskończenie nisko w "No Lava") - inf - inf dałoby nan
+        if self.height == self.prev_height:
+            return self.height
+        return self.height - (self.height - self.prev_height) * (1.0 - alpha)
         
-    def draw(self, camera_y):
-        lava_top = self.height - camera_y
+    def draw(self, camera_y, alpha=1.0):
+        lava_top = self.render_height(alpha) - camera_y
         if lava_top > HEIGHT:
             return
             
         pygame.draw.rect(screen, (255, 80, 0), (0, lava_top, WIDTH, HEIGHT - lava_top))
         pygame.draw.rect(screen, (255, 200, 0), (0, lava_top - 5, WIDTH, 5))
+        if effects is not None:
+            effects.lava(lava_top + camera_y - 5)
+
+# Pamięć podręczna gotowych powierzchni (sprite'y platform, pasek energii,
+# nakładki). Najdawniej używane wpisy są usuwane po przekroczeniu limitu.
+SPIKE_SPRITE_HEIGHT = 10
+COIN_SPRITE_RADIUS = 8
+
+class RenderCache:
+    def __init__(self, max_items=512):
+        self.items = OrderedDict()
+        self.max_items = max_items
+        self.score_key = None
+        self.score_surface = None
+
+    def get(self, key):
+        surface = self.items.get(key)
+        if surface is not None:
+            self.items.move_to_end(key)
+        return surface
+
+    def put(self, key, surface):
+        self.items[key] = surface
+        if len(self.items) > self.max_items:
+            self.items.popitem(last=False)
+        return surface
+
+    def platform_sprite(self, platform):
+        key = platform.get_sprite_key()
+        sprite = self.get(key)
+        if sprite is not None:
+            return sprite
+        
+        # Sprite ma nad platformą miejsce na kolce
+        top = SPIKE_SPRITE_HEIGHT
+        sprite = pygame.Surface((platform.width, top + platform.height), pygame.SRCALPHA)
+        platform_rect = pygame.Rect(0, top, platform.width, platform.height)
+        pygame.draw.rect(sprite, platform.color, platform_rect)
+        pygame.draw.rect(sprite, COLORS['WHITE'], platform_rect, 1)
+        
+        if platform.has_spikes:
+            spike_x = platform.spike_offset
+            pygame.draw.polygon(sprite, (200, 50, 50), [
+                (spike_x, top - 10),
+                (spike_x - 5, top),
+                (spike_x + 5, top)
+            ])
+        
+        if platform.is_slippery:
+            for shine_x in key[5]:
+                pygame.draw.circle(sprite, COLORS['WHITE'], (shine_x, top + 5), 2)
+        
+        return self.put(key, sprite.convert_alpha())
+
+    def coin_sprite(self):
+        sprite = self.get("coin")
+        if sprite is None:
+            size = COIN_SPRITE_RADIUS * 2 + 1
+            sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+            center = (COIN_SPRITE_RADIUS, COIN_SPRITE_RADIUS)
+            pygame.draw.circle(sprite, COLORS['GOLD'], center, 8)
+            pygame.draw.circle(sprite, (255, 235, 100), center, 5)
+            sprite = self.put("coin", sprite.convert_alpha())
+        return sprite
+
+    def gradient_bar(self, width, height):
+        # Gradient zielony -> żółty -> czerwony, przycinany później do wypełnienia.
+        # Linie mają height + 1 pikseli, tak jak rysowane wcześniej co klatkę.
+        key = ("gradient", width, height)
+        bar = self.get(key)
+        if bar is None:
+            bar = pygame.Surface((width, height + 1))
+            for i in range(width):
+                ratio = i / width
+                if ratio < 0.5:
+                    r = int(255 * (ratio * 2))
+                    g = 255
+                    b = 0
+                else:
+                    r = 255
+                    g = int(255 * (1 - (ratio - 0.5) * 2))
+                    b = 0
+                
+                pygame.draw.line(bar, (r, g, b), (i, 0), (i, height))
+            bar = self.put(key, bar.convert())
+        return bar
+
+    def text(self, font, string, color):
+        # Napisy, które rzadko się zmieniają (etykiety HUD, menu, ekrany końca gry)
+        key = ("text", font, string, color)
+        surface = self.get(key)
+        if surface is None:
+            surface = self.put(key, font.render(string, True, color))
+        return surface
+
+    def score_text(self, font, score):
+        # Wynik zmienia się tylko przy lądowaniu wyżej - jeden napis poza LRU,
+        # żeby kolejne wartości nie wypychały sprite'ów
+        key = (font, score)
+        if key != self.score_key:
+            self.score_key = key
+            self.score_surface = font.render(f"Score: {score}", True, COLORS['WHITE'])
+        return self.score_surface
+
+    def overlay(self, alpha):
+        key = ("overlay", alpha)
+        overlay = self.get(key)
+        if overlay is None:
+            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, alpha))
+            overlay = self.put(key, overlay.convert_alpha())
+        return overlay
+
+render_cache = RenderCache()
+
+# Czcionki wspólne dla całego procesu. SysFont przegląda listę czcionek
+# systemu, więc każdy rozmiar tworzony jest tylko raz.
+fonts = {}
+
+def get_font(size):
+    font = fonts.get(size)
+    if font is None:
+        font = fonts[size] = pygame.font.SysFont(None, size)
+    return font
+
+# Statyczna część wieży (nieruchome platformy z kolcami i błyskami) składana
+# w kafle szerokości ekranu i stałej wysokości, razem z tłem regionu. Co
+# klatkę rysowane są tylko kafle w kadrze, a ruchome elementy na nich. Kafel
+# jest składany od nowa, gdy zmieni się tło albo zestaw jego platform, a kafle
+# poza kadrem (minięte przez kamerę) są oddawane do ponownego użycia.
+TILE_HEIGHT = 256
+
+class TowerTiles:
+    def __init__(self):
+        self.tiles = {}
+        self.spare = []
+
+    def tile(self, index, platforms, bg_color):
+        top = index * TILE_HEIGHT
+        # Platformy, których sprite (z kolcami nad platformą) wchodzi w kafel. Lista
+        # jest porównywana wprost, bez filtrowania - to jedyna alokacja przy trafieniu.
+        found = platforms.between(top - PLATFORM_HEIGHT, top + TILE_HEIGHT + SPIKE_SPRITE_HEIGHT)
+        entry = self.tiles.get(index)
+        if entry is not None and entry[0] == bg_color and entry[1] == found:
+            return entry[2]
+        
+        if entry is not None:
+            surface = entry[2]
+        elif self.spare:
+            surface = self.spare.pop()
+        else:
+            surface = pygame.Surface((WIDTH, TILE_HEIGHT)).convert()
+        surface.fill(bg_color)
+        for platform in found:
+            if not platform.is_moving:
+                surface.blit(render_cache.platform_sprite(platform), (platform.x, platform.y - top - SPIKE_SPRITE_HEIGHT))
+        self.tiles[index] = (bg_color, found, surface)
+        return surface
+
+    def draw(self, platforms, camera_y, bg_color):
+        first = camera_y // TILE_HEIGHT
+        last = (camera_y + HEIGHT - 1) // TILE_HEIGHT
+        for index in range(first, last + 1):
+            screen.blit(self.tile(index, platforms, bg_color), (0, index * TILE_HEIGHT - camera_y))
+        
+        if len(self.tiles) > last - first + 1:
+            for index in [index for index in self.tiles if not first <= index <= last]:
+                self.spare.append(self.tiles.pop(index)[2])
+
+# Śledzenie zmienionych obszarów ekranu. Do ekranu wysyłane są tylko obszary
+# z bieżącej i poprzedniej klatki (żeby zamazać to, co zniknęło). Pełne
+# odświeżenie jest wymuszane przy przewinięciu kamery albo zmianie sceny.
+class DirtyRects:
+    def __init__(self):
+        self.rects = []
+        self.previous = []
+        self.full = True
+        self.scene_key = None
+
+    def add(self, rect):
+        self.rects.append(rect)
+
+    def invalidate(self):
+        self.full = True
+
+    def set_scene(self, scene_key):
+        if scene_key != self.scene_key:
+            self.scene_key = scene_key
+            self.full = True
+
+    def add_world(self, sim, camera_y, alpha=1.0):
+        # Ruchome elementy świata widoczne na ekranie (w pozycjach, w których są rysowane)
+        player = sim.player
+        player_x, player_y = player.render_position(alpha)
+        self.add(pygame.Rect(player_x, player_y - camera_y - 20, player.width, player.height + 35))
+        
+        for platform in sim.platforms.between(camera_y - 50, camera_y + HEIGHT + 50):
+            screen_y = platform.y - camera_y
+            if platform.is_moving:
+                self.add(pygame.Rect(platform.left_limit, screen_y - SPIKE_SPRITE_HEIGHT,
+                                     platform.right_limit + platform.width - platform.left_limit + 1,
+                                     SPIKE_SPRITE_HEIGHT + platform.height))
+            if platform.has_coin and not platform.coin_collected:
+                size = COIN_SPRITE_RADIUS * 2 + 1
+                self.add(pygame.Rect(platform.render_x(alpha) + platform.width // 2 - COIN_SPRITE_RADIUS - 1,
+                                     screen_y - 30 - COIN_SPRITE_RADIUS - 3, size + 2, size + 6))
+        
+        lava_top = sim.lava.render_height(alpha) - camera_y
+        if lava_top <= HEIGHT:
+            self.add(pygame.Rect(0, lava_top - 6, WIDTH, HEIGHT - lava_top + 6))
+
+    def update_display(self):
+        if self.full:
+            pygame.display.flip()
+        elif self.rects or self.previous:
+            self.previous.extend(self.rects)
+            pygame.display.update(self.previous)
+        
+        self.previous.clear()
+        self.previous, self.rects = self.rects, self.previous
+        self.full = False
 
 # Funkcja generująca platformy
-def generate_platforms(num_platforms, start_y, current_region=0):
+def generate_platforms(num_platforms, start_y, current_region=0, last_center_x=WIDTH // 2, rng=random,
+                       end_center_x=None):
     platforms = []
     y = start_y
-    last_center_x = WIDTH // 2
     max_offset = 200  
     
     for i in range(num_platforms):
         region = REGIONS[current_region]
         
-        width = random.randint(*region["platform_width"])
+        width = rng.randint(*region["platform_width"])
+        
+        low = max(width//2, last_center_x - max_offset)
+        high = min(WIDTH - width//2, last_center_x + max_offset)
+        if end_center_x is not None:
+            # Łańcuch musi dać się domknąć na ostatniej platformie w end_center_x
+            reach = (num_platforms - 1 - i) * max_offset
+            low = max(low, end_center_x - reach)
+            high = min(high, end_center_x + reach)
         
-        new_center = random.randint(
-            max(width//2, last_center_x - max_offset),
-            min(WIDTH - width//2, last_center_x + max_offset)
-        )
+        new_center = rng.randint(low, high)
         x = new_center - width//2
         
-        platform = Platform(x, y, width, current_region)
+        platform = Platform(x, y, width, current_region, rng)
         platforms.append(platform)
         
         last_center_x = new_center
@@ -417,48 +770,209 @@ def generate_platforms(num_platforms, start_y, current_region=0):
     
     return platforms
 
+# Okno platform posortowanych po wysokości - bufor pierścieniowy na liście.
+# Platformy są trzymane w kolejności generowania (malejące y), więc klucze -y
+# rosną i można po nich robić bisect. Nowe platformy dochodzą na końcu (góra
+# wieży), a minięte przez kamerę odpadają od początku przez przesunięcie start.
+class PlatformIndex:
+    COMPACT_THRESHOLD = 64
+
+    def __init__(self, platforms=()):
+        self.platforms = list(platforms)
+        self.keys = [-p.y for p in self.platforms]
+        self.start = 0
+
+    def __len__(self):
+        return len(self.platforms) - self.start
+
+    def __iter__(self):
+        return islice(self.platforms, self.start, None)
+
+    def append(self, platform):
+        self.platforms.append(platform)
+        self.keys.append(-platform.y)
+
+    def extend(self, platforms):
+        for platform in platforms:
+            self.append(platform)
+
+    def between(self, top_y, bottom_y):
+        # Platformy o y w przedziale [top_y, bottom_y], od najniższej
+        lo = bisect_left(self.keys, -bottom_y, self.start)
+        hi = bisect_right(self.keys, -top_y, lo)
+        return self.platforms[lo:hi]
+
+    def snapshot(self):
+        # Bieżące okno bez platform już usuniętych
+        return self.platforms[self.start:], self.keys[self.start:]
+
+    def restore(self, state):
+        platforms, keys = state
+        self.platforms = list(platforms)
+        self.keys = list(keys)
+        self.start = 0
+
+    def drop_below(self, bottom_y):
+        # Usuń z dołu platformy z y >= bottom_y
+        platforms = self.platforms
+        start = self.start
+        end = len(platforms)
+        while start < end and platforms[start].y >= bottom_y:
+            platforms[start] = None
+            start += 1
+        self.start = start
+        
+        # Co jakiś czas zwolnij miejsce po usuniętych platformach
+        if start >= self.COMPACT_THRESHOLD and start * 2 >= end:
+            del platforms[:start]
+            del self.keys[:start]
+            self.start = 0
+
+# Wieża generowana w kawałkach stałej wysokości. Zawartość kawałka zależy
+# tylko od (ziarna, numeru kawałka), więc dowolną wysokość można odtworzyć
+# bez generowania wszystkiego poniżej. Region wynika z wysokości kawałka.
+# Każdy kawałek kończy się platformą na środku ekranu, a następny zaczyna
+# w zasięgu max_offset od niej, więc łańcuch platform nie rwie się na granicy.
+TOWER_BASE_Y = HEIGHT - 150
+CHUNK_HEIGHT = 1680
+CHUNK_CACHE_SIZE = 64
+CHUNK_PREFETCH = 2
+
+def region_for_height(y):
+    for i, region in enumerate(REGIONS):
+        if y > region["height"]:
+            return i
+    return len(REGIONS) - 1
+
+class Tower:
+    def __init__(self, seed, cache_size=CHUNK_CACHE_SIZE, prefetch=0):
+        self.seed = seed
+        self.cache_size = cache_size
+        self.chunks = OrderedDict()
+        self.lock = threading.Lock()
+        
+        # Opcjonalne generowanie kolejnych kawałków w wątku w tle
+        self.prefetch = prefetch
+        self.prefetch_queue = None
+        self.prefetch_thread = None
+        if prefetch > 0:
+            self.prefetch_queue = queue.Queue()
+            self.prefetch_thread = threading.Thread(target=self.prefetch_worker, daemon=True)
+            self.prefetch_thread.start()
+
+    def build_chunk(self, index):
+        bottom_y = TOWER_BASE_Y - index * CHUNK_HEIGHT
+        region = region_for_height(bottom_y)
+        gap_y = REGIONS[region]["gap_y"]
+        count = -(-CHUNK_HEIGHT // gap_y)
+        rng = random.Random(f"{self.seed}/{index}")
+        return tuple(generate_platforms(count, bottom_y, region, rng=rng, end_center_x=WIDTH // 2))
+
+    def chunk(self, index):
+        # Wzorce platform kawałka - nie modyfikować, do gry służy platform()
+        with self.lock:
+            platforms = self.chunks.get(index)
+            if platforms is not None:
+                self.chunks.move_to_end(index)
+                return platforms
+        
+        platforms = self.build_chunk(index)
+        with self.lock:
+            self.chunks[index] = platforms
+            while len(self.chunks) > self.cache_size:
+                self.chunks.popitem(last=False)
+        return platforms
+
+    def platform(self, index, position):
+        # Świeża kopia platformy, którą gra może przesuwać i z której zbiera monety
+        return copy.copy(self.chunk(index)[position])
+
+    def request_prefetch(self, index):
+        if self.prefetch_queue is not None:
+            self.prefetch_queue.put(index)
+
+    def prefetch_worker(self):
+        while True:
+            start = self.prefetch_queue.get()
+            if start is None:
+                break
+            for index in range(start, start + self.prefetch):
+                with self.lock:
+                    cached = index in self.chunks
+                if not cached:
+                    self.chunk(index)
+
+    def close(self):
+        # Kończy wątek generowania w tle - inaczej każda nowa gra zostawiałaby
+        # działający wątek, który trzyma przy życiu całą wieżę
+        if self.prefetch_thread is not None:
+            self.prefetch_queue.put(None)
+            self.prefetch_thread.join()
+            self.prefetch_thread = None
+            self.prefetch_queue = None
+
+# Oczekiwanie na zdarzenia, gdy nic się nie animuje (menu, pauza, koniec gry).
+# Proces śpi w pygame.event.wait zamiast kręcić pętlą; po upływie limitu
+# wraca z pustą listą, a po pierwszym zdarzeniu zabiera też resztę kolejki.
+IDLE_TIMEOUT_MS = 1000
+
+def wait_events(timeout=IDLE_TIMEOUT_MS):
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
 class Menu:
     def __init__(self):
         self.selected_option = 0
         self.options = list(DIFFICULTY_SETTINGS.keys())
-        self.font_large = pygame.font.SysFont(None, 72)
-        self.font_medium = pygame.font.SysFont(None, 48)
+        self.font_large = get_font(72)
+        self.font_medium = get_font(48)
         self.title_color = COLORS['GOLD']
         self.selected_color = COLORS['WHITE']
         self.unselected_color = (150, 150, 150)
+        self.needs_redraw = True
         
     def draw(self):
+        # Menu jest statyczne - rysuj tylko po zmianie
+        if not self.needs_redraw:
+            return
+        self.needs_redraw = False
+        
         screen.fill(COLORS['BLACK'])
         
         # Tytuł gry
-        title = self.font_large.render("ICY TOWER", True, self.title_color)
+        title = render_cache.text(self.font_large, "ICY TOWER", self.title_color)
         title_rect = title.get_rect(center=(WIDTH // 2, HEIGHT // 4))
         screen.blit(title, title_rect)
         
         # Podtytuł
-        subtitle = self.font_medium.render("Select Difficulty", True, COLORS['WHITE'])
+        subtitle = render_cache.text(self.font_medium, "Select Difficulty", COLORS['WHITE'])
         subtitle_rect = subtitle.get_rect(center=(WIDTH // 2, HEIGHT // 4 + 60))
         screen.blit(subtitle, subtitle_rect)
         
         # Opcje trudności
         for i, option in enumerate(self.options):
             color = self.selected_color if i == self.selected_option else self.unselected_color
-            text = self.font_medium.render(option, True, color)
+            text = render_cache.text(self.font_medium, option, color)
             text_rect = text.get_rect(center=(WIDTH // 2, HEIGHT // 2 + i * 60))
             screen.blit(text, text_rect)
         
         # Instrukcja
-        instruction = self.font_medium.render("Press ENTER to start", True, COLORS['WHITE'])
+        instruction = render_cache.text(self.font_medium, "Press ENTER to start", COLORS['WHITE'])
         instruction_rect = instruction.get_rect(center=(WIDTH // 2, HEIGHT * 4 // 5))
         screen.blit(instruction, instruction_rect)
         
         pygame.display.flip()
     
-    def handle_input(self):
-        for event in pygame.event.get():
+    def handle_input(self, events):
+        for event in events:
             if event.type == pygame.QUIT:
                 return False, None
+            if event.type == pygame.WINDOWEXPOSED:
+                self.needs_redraw = True
             if event.type == pygame.KEYDOWN:
+                self.needs_redraw = True
                 if event.key == pygame.K_UP:
                     self.selected_option = (self.selected_option - 1) % len(self.options)
                 elif event.key == pygame.K_DOWN:
@@ -467,200 +981,711 @@ class Menu:
                     return False, self.options[self.selected_option]
         return True, None
 
-def game_loop(difficulty):
-    clock = pygame.time.Clock()
-    player = Player()
+# Bity wejścia - stan klawiszy w jednej klatce
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
+INPUT_HYPER = 8
+
+def read_inputs(keys):
+    inputs = 0
+    if keys[pygame.K_LEFT]:
+        inputs |= INPUT_LEFT
+    if keys[pygame.K_RIGHT]:
+        inputs |= INPUT_RIGHT
+    if keys[pygame.K_SPACE]:
+        inputs |= INPUT_JUMP
+    if keys[pygame.K_UP]:
+        inputs |= INPUT_HYPER
+    return inputs
+
+# Symulacja gry bez okna, kolejki zdarzeń i ograniczenia FPS
+class Simulation:
+    def __init__(self, difficulty, live_platforms=LIVE_PLATFORMS, seed=None, prefetch=0):
+        # Każdy przebieg ma własny generator, więc da się go odtworzyć z ziarna
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # Ostatni odczytany stan generatora (getstate jest drogie) i liczba losowań, której dotyczy
+        self.rng_state = None
+        self.rng_state_draws = None
+        
+        # Zapis wejścia - jeden bajt z bitami INPUT_* na klatkę
+        self.input_log = bytearray()
+        
+        self.difficulty = difficulty
+        self.live_platforms = live_platforms
+        self.player = Player(self.rng)
+        
+        # Stwórz platformę startową na całą szerokość
+        starting_platform = Platform(0, HEIGHT - 100, WIDTH, 0, self.rng)
+        starting_platform.color = (50, 50, 100) 
+        
+        # Platformy pobierane kolejno z wieży generowanej w kawałkach
+        self.tower = Tower(seed, prefetch=prefetch)
+        self.next_chunk = 0
+        self.next_position = 0
+        self.platforms = PlatformIndex([starting_platform])
+        while len(self.platforms) < live_platforms:
+            self.platforms.append(self.next_tower_platform())
+        
+        # Ustawienia lawy
+        difficulty_settings = DIFFICULTY_SETTINGS[difficulty]
+        self.lava = Lava(difficulty_settings["lava_start"])
+        self.lava.rise_speed = difficulty_settings["lava_speed"]
+        
+        self.camera_y = 0
+        self.prev_camera_y = 0
+        self.target_camera_y = 0
+        
+        self.score = 0
+        self.frame = 0
+        self.game_over = False
+        # Przyczyna końca gry: "spike", "lava" albo "fall"
+        self.death_cause = None
+        
+        # Opcjonalny FrameProfiler mierzący fazy kroku
+        self.profiler = None
+
+    def step(self, inputs):
+        if self.game_over:
+            return False
+        
+        self.input_log.append(inputs)
+        player = self.player
+        lava = self.lava
+        profiler = self.profiler
+        
+        if inputs & INPUT_LEFT:
+            player.vel_x = -player.speed
+        if inputs & INPUT_RIGHT:
+            player.vel_x = player.speed
+        if inputs & INPUT_JUMP:
+            player.jump()
+        if inputs & INPUT_HYPER:
+            player.activate_hyper_jump()
+        if profiler is not None:
+            profiler.mark("input")
+        
+        self.prev_camera_y = self.camera_y
+        if player.y < self.camera_y + HEIGHT * CAMERA_FOLLOW_HEIGHT:
+            self.target_camera_y = player.y - HEIGHT * CAMERA_FOLLOW_HEIGHT
+        
+        self.camera_y += (self.target_camera_y - self.camera_y) * CAMERA_SPEED
+        camera_y = self.camera_y
+        if profiler is not None:
+            profiler.mark("camera")
+        
+        # Aktywuj lawę po pierwszym skoku
+        if player.first_jump_made and self.difficulty != "No Lava":
+            lava.active = True
+        
+        for platform in self.platforms:
+            if platform.is_moving:
+                platform.update()
+        
+        lava.update()
+        if profiler is not None:
+            profiler.mark("platforms")
+        
+        # Monety sprawdzane tylko dla platform w zasięgu środka gracza
+        coin_y = player.y + player.height / 2 + 30
+        for platform in self.platforms.between(coin_y - COIN_PICKUP_RADIUS, coin_y + COIN_PICKUP_RADIUS):
+            platform.check_coin_collection(player)
+        if profiler is not None:
+            profiler.mark("coins")
+        
+        alive = player.update(self.platforms, camera_y, lava.height)
+        if not alive:
+            self.game_over = True
+            if player.hit_by_spike:
+                self.death_cause = "spike"
+            elif player.y + player.height > lava.height:
+                self.death_cause = "lava"
+            else:
+                self.death_cause = "fall"
+        if profiler is not None:
+            profiler.mark("player")
+        
+        # Usuń platformy, które kamera minęła
+        platforms = self.platforms
+        platforms.drop_below(camera_y + HEIGHT + 200)
+        if profiler is not None:
+            profiler.mark("culling")
+        
+        # Dokładaj nowe platformy na szczycie wieży
+        while len(platforms) < self.live_platforms:
+            platforms.append(self.next_tower_platform())
+        if profiler is not None:
+            profiler.mark("generation")
+        
+        self.score = player.score
+        self.frame += 1
+        return alive
+
+    # Pełny stan gry do cofnięcia przez restore(). Obiekty platform są wspólne
+    # dla migawki i gry - zapisywane są tylko ich zmienne pola: pozycja
+    # ruchomych i stan monet wszystkich platform z monetą (w obie strony -
+    # migawki można przywracać w dowolnej kolejności, także nowszą po
+    # starszej). Platformy dołożone po migawce są przy restore() odrzucane.
+    # Po utworzeniu gry generator losuje tylko w Player.jump, więc jego stan
+    # zależy wyłącznie od player.rng_draws i jest odczytywany tylko po zmianie.
+    def snapshot(self):
+        draws = self.player.rng_draws
+        if draws != self.rng_state_draws:
+            self.rng_state = self.rng.getstate()
+            self.rng_state_draws = draws
+        platforms = self.platforms.snapshot()
+        moving = []
+        coins = []
+        for platform in platforms[0]:
+            if platform.is_moving:
+                moving.append((platform, platform.x, platform.vel_x, platform.prev_x))
+            if platform.has_coin:
+                coins.append((platform, platform.coin_collected))
+        lava = self.lava
+        return (self.player.__dict__.copy(), platforms, moving, coins,
+                lava.height, lava.prev_height, lava.active,
+                self.camera_y, self.prev_camera_y, self.target_camera_y,
+                self.score, self.frame, self.game_over, self.death_cause,
+                self.next_chunk, self.next_position, bytes(self.input_log), self.rng_state)
+
+    def restore(self, snapshot):
+        draws = self.player.rng_draws
+        (player_state, platforms, moving, coins,
+         lava_height, lava_prev_height, lava_active,
+         self.camera_y, self.prev_camera_y, self.target_camera_y,
+         self.score, self.frame, self.game_over, self.death_cause,
+         self.next_chunk, self.next_position, input_log, rng_state) = snapshot
+        self.player.__dict__.update(player_state)
+        self.platforms.restore(platforms)
+        for platform, x, vel_x, prev_x in moving:
+            platform.x = x
+            platform.vel_x = vel_x
+            platform.prev_x = prev_x
+        for platform, coin_collected in coins:
+            platform.coin_collected = coin_collected
+        lava = self.lava
+        lava.height = lava_height
+        lava.prev_height = lava_prev_height
+        lava.active = lava_active
+        self.input_log[:] = input_log
+        if draws != self.player.rng_draws:
+            self.rng.setstate(rng_state)
+
+    def next_tower_platform(self):
+        tower = self.tower
+        platform = tower.platform(self.next_chunk, self.next_position)
+        self.next_position += 1
+        if self.next_position == len(tower.chunk(self.next_chunk)):
+            self.next_chunk += 1
+            self.next_position = 0
+            tower.request_prefetch(self.next_chunk + 1)
+        return platform
+
+# Pomiar czasu poszczególnych faz klatki. Ostatnie `window` klatek służy do
+# liczenia p50/p99 na nakładce, a dłuższa historia do zapisu w CSV.
+PROFILE_PHASES = ("events", "input", "camera", "platforms", "coins", "player",
+                  "culling", "generation", "draw", "flip", "capture", "sleep")
+PROFILE_CSV_PATH = "frame_profile.csv"
+ALLOCATION_CSV_PATH = "frame_allocations.csv"
+
+class FrameProfiler:
+    def __init__(self, window=240, history=3600):
+        self.window = window
+        self.samples = {phase: deque(maxlen=window) for phase in PROFILE_PHASES}
+        self.history = deque(maxlen=history)
+        self.current = dict.fromkeys(PROFILE_PHASES, 0.0)
+        self.last = time.perf_counter()
+        self.frame = 0
+        self.show_overlay = False
+        self.overlay_lines = []
+        # AllocationTracker, gdy włączone śledzenie alokacji (F5)
+        self.allocations = None
+
+    def start_frame(self):
+        for phase in PROFILE_PHASES:
+            self.current[phase] = 0.0
+        if self.allocations is not None:
+            self.allocations.start_frame()
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        # Czas od poprzedniego znacznika idzie na konto podanej fazy
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        if self.allocations is not None:
+            self.allocations.mark(phase)
+            now = time.perf_counter()
+        self.last = now
+
+    def end_frame(self):
+        row = [self.frame]
+        for phase in PROFILE_PHASES:
+            value = self.current[phase]
+            self.samples[phase].append(value)
+            row.append(value)
+        self.history.append(row)
+        if self.allocations is not None:
+            self.allocations.end_frame(self.frame)
+        self.frame += 1
+
+    def track_allocations(self, enabled):
+        if enabled and self.allocations is None:
+            self.allocations = AllocationTracker(self.window, self.history.maxlen)
+            self.allocations.start()
+        elif not enabled and self.allocations is not None:
+            self.allocations.stop()
+            self.allocations = None
+        self.overlay_lines = []
+
+    def percentile(self, phase, q):
+        values = sorted(self.samples[phase])
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def draw(self, font):
+        # Tekst nakładki odświeżany co pół sekundy, żeby nie sortować co klatkę
+        if self.frame % 30 == 0 or not self.overlay_lines:
+            allocations = self.allocations
+            header = "phase        p50 ms   p99 ms"
+            if allocations is not None:
+                header += "   p50 kB  blocks  gc"
+            self.overlay_lines = [font.render(header, True, COLORS['WHITE'])]
+            for phase in PROFILE_PHASES:
+                p50 = self.percentile(phase, 0.5) * 1000
+                p99 = self.percentile(phase, 0.99) * 1000
+                line = f"{phase:<11} {p50:7.3f}  {p99:7.3f}"
+                if allocations is not None:
+                    kb, blocks, collections = allocations.phase_summary(phase)
+                    line += f"  {kb:7.1f}  {blocks:6d}  {collections:2d}"
+                self.overlay_lines.append(font.render(line, True, COLORS['WHITE']))
+        
+        line_height = font.get_linesize()
+        width = max(line.get_width() for line in self.overlay_lines) + 10
+        rect = pygame.Rect(WIDTH - width - 10, 70, width, line_height * len(self.overlay_lines) + 10)
+        screen.fill((0, 0, 0), rect)
+        for i, line in enumerate(self.overlay_lines):
+            screen.blit(line, (rect.x + 5, rect.y + 5 + i * line_height))
+        return rect
+
+    def dump_csv(self, path=PROFILE_CSV_PATH):
+        with open(path, "w") as f:
+            f.write("frame," + ",".join(f"{phase}_ms" for phase in PROFILE_PHASES) + "\n")
+            for row in self.history:
+                f.write(str(row[0]) + "," + ",".join(f"{value * 1000:.4f}" for value in row[1:]) + "\n")
+        if self.allocations is not None:
+            self.allocations.dump_csv()
+
+# Alokacje w fazach klatki (F5, obok czasów FrameProfiler). Dla każdej fazy:
+# szczyt pamięci obiektów Pythona ponad stan z jej początku (tracemalloc -
+# obejmuje też obiekty tymczasowe zwolnione przed końcem fazy), przyrost
+# żywych bloków (sys.getallocatedblocks) i liczba zbiórek gc (gc.callbacks).
+# tracemalloc kilkukrotnie spowalnia grę, więc śledzenie jest domyślnie wyłączone.
+class AllocationTracker:
+    def __init__(self, window=240, history=3600):
+        self.samples = {phase: deque(maxlen=window) for phase in PROFILE_PHASES}
+        self.history = deque(maxlen=history)
+        self.current = {phase: [0, 0, 0] for phase in PROFILE_PHASES}
+        self.collections = 0
+        self.base_memory = 0
+        self.base_blocks = 0
+        self.overhead = 0
+        self.started_tracemalloc = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        gc.callbacks.append(self.on_gc)
+        # Sam pomiar też alokuje (krotka i liczby) - odejmowane od każdej fazy
+        self.reset_base()
+        self.overhead = self.measure()[0] - self.base_memory
+        self.reset_base()
+
+    def stop(self):
+        gc.callbacks.remove(self.on_gc)
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.collections += 1
+
+    def reset_base(self):
+        tracemalloc.reset_peak()
+        self.base_memory = tracemalloc.get_traced_memory()[0]
+        self.base_blocks = sys.getallocatedblocks()
+
+    def start_frame(self):
+        for entry in self.current.values():
+            entry[0] = entry[1] = entry[2] = 0
+        self.collections = 0
+        self.reset_base()
+
+    def measure(self):
+        return tracemalloc.get_traced_memory()[1], sys.getallocatedblocks()
+
+    def mark(self, phase):
+        # Faza może być oznaczona kilka razy w klatce (kilka kroków fizyki) - wartości się sumują
+        peak, blocks = self.measure()
+        entry = self.current[phase]
+        entry[0] += max(0, peak - self.base_memory - self.overhead)
+        entry[1] += blocks - self.base_blocks
+        entry[2] += self.collections
+        self.collections = 0
+        self.reset_base()
+
+    def end_frame(self, frame):
+        row = [frame]
+        for phase in PROFILE_PHASES:
+            entry = tuple(self.current[phase])
+            self.samples[phase].append(entry)
+            row.extend(entry)
+        self.history.append(row)
+
+    def phase_summary(self, phase):
+        # (p50 kB na klatkę, przyrost bloków i zbiórki gc w całym oknie)
+        samples = self.samples[phase]
+        if not samples:
+            return 0.0, 0, 0
+        sizes = sorted(sample[0] for sample in samples)
+        return (sizes[len(sizes) // 2] / 1024, sum(sample[1] for sample in samples),
+                sum(sample[2] for sample in samples))
+
+    def frame_totals(self):
+        # Suma po fazach dla każdej klatki w oknie: (bajty, bloki, zbiórki gc)
+        totals = []
+        for samples in zip(*(self.samples[phase] for phase in PROFILE_PHASES)):
+            totals.append(tuple(sum(values) for values in zip(*samples)))
+        return totals
+
+    def dump_csv(self, path=ALLOCATION_CSV_PATH):
+        with open(path, "w") as f:
+            f.write("frame," + ",".join(f"{phase}_bytes,{phase}_blocks,{phase}_gc" for phase in PROFILE_PHASES) + "\n")
+            for row in self.history:
+                f.write(",".join(str(value) for value in row) + "\n")
+
+# Zapis przebiegu: nagłówek (ziarno, poziom trudności, wynik, liczba klatek)
+# i skompresowany log wejścia. Katalog zapisów ustawia --replay-dir
+REPLAY_DIR = None
+REPLAY_MAGIC = b"ICY2"
+REPLAY_HEADER = struct.Struct("<4sQBII")
+
+def save_replay(path, sim):
+    difficulty_index = list(DIFFICULTY_SETTINGS).index(sim.difficulty)
+    header = REPLAY_HEADER.pack(REPLAY_MAGIC, sim.seed, difficulty_index, sim.score, len(sim.input_log))
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(zlib.compress(bytes(sim.input_log), 9))
+
+def load_replay(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    # Każdy uszkodzony plik kończy się ValueError - weryfikacja wielu zapisów idzie dalej
+    if len(data) < REPLAY_HEADER.size:
+        raise ValueError(f"{path}: not a replay file")
+    magic, seed, difficulty_index, score, frames = REPLAY_HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC:
+        raise ValueError(f"{path}: not a replay file")
+    if difficulty_index >= len(DIFFICULTY_SETTINGS):
+        raise ValueError(f"{path}: unknown difficulty {difficulty_index}")
+    try:
+        input_log = zlib.decompress(data[REPLAY_HEADER.size:])
+    except zlib.error as error:
+        raise ValueError(f"{path}: corrupt input log ({error})") from None
+    if len(input_log) != frames:
+        raise ValueError(f"{path}: truncated input log")
+    difficulty = list(DIFFICULTY_SETTINGS)[difficulty_index]
+    return seed, difficulty, input_log, score
+
+def replay(seed, difficulty, input_log):
+    # Odtworzenie przebiegu bez okna, tak szybko jak się da
+    sim = Simulation(difficulty, seed=seed)
+    step = sim.step
+    for frame, inputs in enumerate(input_log):
+        if sim.game_over:
+            raise ValueError(f"game ended at frame {frame} of {len(input_log)}")
+        step(inputs)
+    return sim
+
+def draw_game(sim, font, small_font, large_font, paused, dirty=None, alpha=1.0, tiles=None):
+    player = sim.player
+    # Kamera interpolowana między krokami fizyki i przyciągnięta do pełnych
+    # pikseli, żeby statyczna scena nie drgała
+    camera_y = math.floor(sim.camera_y - (sim.camera_y - sim.prev_camera_y) * (1.0 - alpha))
+    score = sim.score
     
-    # Stwórz platformę startową na całą szerokość
-    starting_platform = Platform(0, HEIGHT - 100, WIDTH, 0)
-    starting_platform.color = (50, 50, 100) 
+    if dirty is not None:
+        dirty.set_scene((camera_y, player.current_region, paused, sim.game_over))
+        dirty.add_world(sim, camera_y, alpha)
     
-    # Generuj początkowe platformy
-    platforms = generate_platforms(30, HEIGHT - 150)
-    platforms.insert(0, starting_platform)  
+    # Ustawienie koloru tła na podstawie aktualnego regionu
+    current_region = player.current_region
+    bg_color = REGIONS[current_region]["color"]
+    if tiles is not None:
+        tiles.draw(sim.platforms, camera_y, bg_color)
+    else:
+        screen.fill(bg_color)
     
-    # Ustawienia lawy
-    difficulty_settings = DIFFICULTY_SETTINGS[difficulty]
-    lava = Lava(difficulty_settings["lava_start"])
-    lava.rise_speed = difficulty_settings["lava_speed"]
+    # Tylko platformy w kadrze (z zapasem na kolce i kołyszące się monety nad nimi).
+    # Z kafli przychodzą już nieruchome platformy - zostają ruchome i monety.
+    for platform in sim.platforms.between(camera_y - PLATFORM_HEIGHT, camera_y + HEIGHT + 32 + COIN_SPRITE_RADIUS):
+        if tiles is None or platform.is_moving:
+            platform.draw(camera_y, alpha)
+        else:
+            platform.draw_coin(platform.x, camera_y)
     
-    camera_y = 0
-    target_camera_y = 0
+    sim.lava.draw(camera_y, alpha)
+    if effects is not None:
+        effects_rect = effects.draw(screen, camera_y)
+        if dirty is not None and effects_rect is not None:
+            dirty.add(effects_rect)
+    player.draw(camera_y, alpha)
     
-    score = 0
-    font = pygame.font.SysFont(None, 36)
-    small_font = pygame.font.SysFont(None, 24)
-    large_font = pygame.font.SysFont(None, 72)
-    game_over = False
-    paused = False
+    # Wyświetlanie informacji o poziomie trudności
+    score_text = render_cache.score_text(font, score)
+    score_rect = screen.blit(score_text, (10, 10))
     
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_r and game_over:
-                    return True
-                if event.key == pygame.K_p:
-                    paused = not paused
-                if event.key == pygame.K_ESCAPE:
-                    return True
-        
-        if not game_over and not paused:
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_LEFT]:
-                player.vel_x = -player.speed
-            if keys[pygame.K_RIGHT]:
-                player.vel_x = player.speed
-            if keys[pygame.K_SPACE]:
-                player.jump()
-            if keys[pygame.K_UP]:
-                player.activate_hyper_jump()
-            
-            if player.y < camera_y + HEIGHT * CAMERA_FOLLOW_HEIGHT:
-                target_camera_y = player.y - HEIGHT * CAMERA_FOLLOW_HEIGHT
-            
-            camera_y += (target_camera_y - camera_y) * CAMERA_SPEED
-            
-            # Aktywuj lawę po pierwszym skoku
-            if player.first_jump_made and difficulty != "No Lava":
-                lava.active = True
-            
-            for platform in platforms:
-                platform.update()
-            
-            lava.update()
-            
-            for platform in platforms:
-                platform.check_coin_collection(player)
-            
-            alive = player.update(platforms, camera_y, lava.height)
-            if not alive:
-                game_over = True
-            
-            # Usuń platformy poza ekranem
-            platforms = [p for p in platforms if p.y > camera_y - 100 and p.y < camera_y + HEIGHT + 200]
-            
-            # Generuj nowe platformy jeśli potrzeba
-            if len(platforms) < 30:  
-                new_platforms_needed = 30 - len(platforms)
-                if platforms:
-                    highest_platform = min(platforms, key=lambda p: p.y)
-                    region = REGIONS[player.current_region]
-                    start_y = highest_platform.y - region["gap_y"]  
-                    new_platforms = generate_platforms(new_platforms_needed, 
-                                                    start_y, 
-                                                    player.current_region)
-                    platforms.extend(new_platforms)
-            
-            score = player.score
-        
-        screen.fill(COLORS['BLACK'])
-        
-        # Ustawienie koloru tła na podstawie aktualnego regionu
-        current_region = player.current_region
-        bg_color = REGIONS[current_region]["color"]
-        screen.fill(bg_color)
-        
-        for platform in platforms:
-            platform.draw(camera_y)
+    difficulty_text = render_cache.text(small_font, f"Difficulty: {sim.difficulty}", COLORS['WHITE'])
+    screen.blit(difficulty_text, (WIDTH - difficulty_text.get_width() - 10, 40))
+    
+    region_name = REGIONS[player.current_region]["name"]
+    region_text = render_cache.text(small_font, f"Region: {region_name}", COLORS['WHITE'])
+    screen.blit(region_text, (10, 40))  
+    
+    # Pasek energii do hyper skoku
+    coin_bar_width = 150
+    coin_bar_height = 15
+    coin_bar_x = 10
+    coin_bar_y = 90 
+    
+    pygame.draw.rect(screen, (200, 200, 200), (coin_bar_x, coin_bar_y, coin_bar_width, coin_bar_height))
+    
+    fill_width = int((player.coins / player.max_coins) * coin_bar_width)
+    if fill_width > 0:
+        bar = render_cache.gradient_bar(coin_bar_width, coin_bar_height)
+        screen.blit(bar, (coin_bar_x, coin_bar_y), (0, 0, fill_width, coin_bar_height + 1))
+    
+    pygame.draw.rect(screen, (255, 255, 255), (coin_bar_x, coin_bar_y, coin_bar_width, coin_bar_height), 1)
+    
+    coin_text = render_cache.text(small_font, "Hyper Jump Energy", COLORS['WHITE'])
+    screen.blit(coin_text, (coin_bar_x, coin_bar_y - 20))
+    
+    if player.hyper_jump_active:
+        active_text = render_cache.text(small_font, "HYPER JUMP READY!", COLORS['PURPLE'])
+        active_rect = screen.blit(active_text, (WIDTH - active_text.get_width() - 10, 10))
+        if dirty is not None:
+            dirty.add(active_rect)
+    
+    if dirty is not None:
+        dirty.add(score_rect)
+        dirty.add(pygame.Rect(coin_bar_x, coin_bar_y, coin_bar_width, coin_bar_height + 1))
+    
+    if sim.game_over:
+        screen.blit(render_cache.overlay(180), (0, 0))
         
-        lava.draw(camera_y)
-        player.draw(camera_y)
+        game_over_text = render_cache.text(font, "GAME OVER", COLORS['RED'])
+        screen.blit(game_over_text, (WIDTH // 2 - game_over_text.get_width() // 2, HEIGHT // 2 - 100))
         
-        # Wyświetlanie informacji o poziomie trudności
-        score_text = font.render(f"Score: {score}", True, COLORS['WHITE'])
-        screen.blit(score_text, (10, 10))
+        score_big_text = render_cache.text(large_font, f"SCORE: {score}", COLORS['WHITE'])
+        screen.blit(score_big_text, (WIDTH // 2 - score_big_text.get_width() // 2, HEIGHT // 2 - 20))
         
-        difficulty_text = small_font.render(f"Difficulty: {difficulty}", True, COLORS['WHITE'])
-        screen.blit(difficulty_text, (WIDTH - difficulty_text.get_width() - 10, 40))
+        restart_text = render_cache.text(font, "Press R to Restart", COLORS['WHITE'])
+        screen.blit(restart_text, (WIDTH // 2 - restart_text.get_width() // 2, HEIGHT // 2 + 60))
+    
+    if paused and not sim.game_over:
+        screen.blit(render_cache.overlay(150), (0, 0))
         
-        region_name = REGIONS[player.current_region]["name"]
-        region_text = small_font.render(f"Region: {region_name}", True, COLORS['WHITE'])
-        screen.blit(region_text, (10, 40))  
+        paused_text = render_cache.text(large_font, "PAUSED", COLORS['WHITE'])
+        screen.blit(paused_text, (WIDTH // 2 - paused_text.get_width() // 2, HEIGHT // 2 - 50))
         
-        # Pasek energii do hyper skoku
-        coin_bar_width = 150
-        coin_bar_height = 15
-        coin_bar_x = 10
-        coin_bar_y = 90 
+        resume_text = render_cache.text(font, "Press P to Resume", COLORS['WHITE'])
+        screen.blit(resume_text, (WIDTH // 2 - resume_text.get_width() // 2, HEIGHT // 2 + 30))
+
+def game_loop(difficulty):
+    clock = pygame.time.Clock()
+    sim = Simulation(difficulty, prefetch=CHUNK_PREFETCH)
+    
+    # F3 - nakładka z czasami faz klatki, F4 - zapis czasów do CSV,
+    # F5 - pomiar przydziałów pamięci (wyłączany przy wyjściu z gry)
+    profiler = FrameProfiler()
+    sim.profiler = profiler
+    try:
+        font = get_font(36)
+        small_font = get_font(24)
+        large_font = get_font(72)
+        paused = False
+        dirty = DirtyRects() if DIRTY_RECT_UPDATES else None
+        tiles = TowerTiles()
+        if effects is not None:
+            effects.clear()
+    
+        # Po narysowaniu pauzy albo ekranu końca gry scena stoi - pętla czeka
+        # na zdarzenia i rysuje ponownie dopiero po którymś z nich
+        scene_static = False
+    
+        # Czas do rozliczenia w krokach fizyki
+        accumulator = 0.0
+        last_time = time.perf_counter()
+    
+        running = True
+        while running:
+            if scene_static:
+                events = wait_events()
+                if not events:
+                    continue
+                # Czas czekania nie jest doliczany do symulacji
+                last_time = time.perf_counter()
+            else:
+                events = pygame.event.get()
         
-        pygame.draw.rect(screen, (200, 200, 200), (coin_bar_x, coin_bar_y, coin_bar_width, coin_bar_height))
+            profiler.start_frame()
+            for event in events:
+                if event.type == pygame.QUIT:
+                    return False
+                if event.type == pygame.WINDOWEXPOSED and dirty is not None:
+                    dirty.invalidate()
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_r and sim.game_over:
+                        return True
+                    if event.key == pygame.K_p:
+                        paused = not paused
+                    if event.key == pygame.K_ESCAPE:
+                        return True
+                    if event.key == pygame.K_F3:
+                        profiler.show_overlay = not profiler.show_overlay
+                        if dirty is not None:
+                            dirty.invalidate()
+                    if event.key == pygame.K_F4:
+                        profiler.dump_csv()
+                    if event.key == pygame.K_F5:
+                        profiler.track_allocations(profiler.allocations is None)
+                        if dirty is not None:
+                            dirty.invalidate()
+            profiler.mark("events")
         
-        fill_width = int((player.coins / player.max_coins) * coin_bar_width)
-        if fill_width > 0:
-            for i in range(fill_width):
-                ratio = i / coin_bar_width
-                if ratio < 0.5:
-                    r = int(255 * (ratio * 2))
-                    g = 255
-                    b = 0
-                else:
-                    r = 255
-                    g = int(255 * (1 - (ratio - 0.5) * 2))
-                    b = 0
-                
-                pygame.draw.line(screen, (r, g, b), 
-                                 (coin_bar_x + i, coin_bar_y), 
-                                 (coin_bar_x + i, coin_bar_y + coin_bar_height))
+            now = time.perf_counter()
+            elapsed = now - last_time
+            last_time = now
         
-        pygame.draw.rect(screen, (255, 255, 255), (coin_bar_x, coin_bar_y, coin_bar_width, coin_bar_height), 1)
+            if not sim.game_over and not paused:
+                inputs = read_inputs(pygame.key.get_pressed())
+                profiler.mark("input")
+                accumulator += elapsed
+                ticks = 0
+                while accumulator >= TICK_TIME and ticks < MAX_TICKS_PER_FRAME and not sim.game_over:
+                    sim.step(inputs)
+                    if spectators is not None:
+                        spectators.publish(sim)
+                    accumulator -= TICK_TIME
+                    ticks += 1
+                # Zbyt wolna maszyna - gra zwalnia zamiast nadrabiać bez końca
+                if ticks == MAX_TICKS_PER_FRAME:
+                    accumulator = min(accumulator, TICK_TIME)
+                if sim.game_over and REPLAY_DIR is not None:
+                    save_replay(os.path.join(REPLAY_DIR, f"run_{sim.seed}.icyr"), sim)
         
-        coin_text = small_font.render("Hyper Jump Energy", True, COLORS['WHITE'])
-        screen.blit(coin_text, (coin_bar_x, coin_bar_y - 20))
+            if sim.game_over or paused:
+                # Po wznowieniu pierwszy krok rusza od razu, a obraz od miejsca, w którym stanął
+                accumulator = TICK_TIME
+                alpha = 1.0
+                if effects is not None:
+                    effects.update(0.0)
+            else:
+                alpha = accumulator / TICK_TIME
+                if effects is not None:
+                    effects.update(elapsed, sim.player)
         
-        if player.hyper_jump_active:
-            active_text = small_font.render("HYPER JUMP READY!", True, COLORS['PURPLE'])
-            screen.blit(active_text, (WIDTH - active_text.get_width() - 10, 10))
+            draw_game(sim, font, small_font, large_font, paused, dirty, alpha, tiles)
+            if profiler.show_overlay:
+                overlay_rect = profiler.draw(small_font)
+                if dirty is not None:
+                    dirty.add(overlay_rect)
+            profiler.mark("draw")
         
-        if game_over:
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 180))
-            screen.blit(overlay, (0, 0))
-            
-            game_over_text = font.render("GAME OVER", True, COLORS['RED'])
-            screen.blit(game_over_text, (WIDTH // 2 - game_over_text.get_width() // 2, HEIGHT // 2 - 100))
-            
-            score_big_text = large_font.render(f"SCORE: {score}", True, COLORS['WHITE'])
-            screen.blit(score_big_text, (WIDTH // 2 - score_big_text.get_width() // 2, HEIGHT // 2 - 20))
-            
-            restart_text = font.render("Press R to Restart", True, COLORS['WHITE'])
-            screen.blit(restart_text, (WIDTH // 2 - restart_text.get_width() // 2, HEIGHT // 2 + 60))
+            if dirty is not None:
+                dirty.update_display()
+            else:
+                pygame.display.flip()
+            profiler.mark("flip")
         
-        if paused and not game_over:
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 150))
-            screen.blit(overlay, (0, 0))
-            
-            paused_text = large_font.render("PAUSED", True, COLORS['WHITE'])
-            screen.blit(paused_text, (WIDTH // 2 - paused_text.get_width() // 2, HEIGHT // 2 - 50))
-            
-            resume_text = font.render("Press P to Resume", True, COLORS['WHITE'])
-            screen.blit(resume_text, (WIDTH // 2 - resume_text.get_width() // 2, HEIGHT // 2 + 30))
+            if recorder is not None:
+                recorder.capture(screen, sim.frame)
+                profiler.mark("capture")
         
-        pygame.display.flip()
-        clock.tick(60)
+            scene_static = paused or sim.game_over
+            clock.tick(RENDER_FPS)
+            profiler.mark("sleep")
+            profiler.end_frame()
     
-    return False
+        return False
+    finally:
+        profiler.track_allocations(False)
+        sim.tower.close()
+
+# Serwer dla widzów (spectator_server.SpectatorServer), uruchamiany przez --spectate
+spectators = None
+
+# Nagrywanie obrazu gry do pliku (capture.FrameRecorder), włączane przez --record
+recorder = None
 
 def main():
+    global spectators, effects, recorder, REPLAY_DIR
+    parser = argparse.ArgumentParser(description="Icy Tower Clone")
+    parser.add_argument("--spectate", type=int, nargs="?", const=8765, metavar="PORT",
+                        help="nadawaj przebieg widzom na localhost (domyślnie port 8765)")
+    parser.add_argument("--no-effects", action="store_true", help="bez efektów cząsteczkowych")
+    parser.add_argument("--record", metavar="PATH", help="nagrywaj rozgrywkę do pliku (podgląd: capture.py)")
+    parser.add_argument("--replay-dir", metavar="DIR", help="zapisuj przebiegi .icyr do katalogu (sprawdzanie: replay.py)")
+    args = parser.parse_args()
+    if args.replay_dir:
+        os.makedirs(args.replay_dir, exist_ok=True)
+        REPLAY_DIR = args.replay_dir
+    if args.spectate is not None:
+        from spectator_server import SpectatorServer
+        spectators = SpectatorServer(port=args.spectate).start()
+    if not args.no_effects:
+        # Bez NumPy gra działa dalej, tylko bez efektów
+        try:
+            from effects import ParticleSystem
+        except ImportError:
+            pass
+        else:
+            effects = ParticleSystem()
+    
+    if args.record:
+        from capture import FrameRecorder
+        recorder = FrameRecorder(args.record)
+    
+    init_display()
     menu = Menu()
     running = True
     
-    while running:
-        menu_active = True
-        while menu_active:
-            menu_active, selected_difficulty = menu.handle_input()
-            if not menu_active and selected_difficulty is None:
-                pygame.quit()
-                sys.exit()
-            menu.draw()
-            
-        if selected_difficulty:
-            restart = game_loop(selected_difficulty)
-            if not restart:
-                running = False
+    try:
+        while running:
+            menu_active = True
+            while menu_active:
+                # Menu jest statyczne - rysuj i czekaj na klawisz bez kręcenia pętlą
+                menu.draw()
+                menu_active, selected_difficulty = menu.handle_input(wait_events())
+                if not menu_active and selected_difficulty is None:
+                    pygame.quit()
+                    sys.exit()
+                
+            if selected_difficulty:
+                restart = game_loop(selected_difficulty)
+                if not restart:
+                    running = False
+                menu.needs_redraw = True
+    finally:
+        # Dopisanie klatek z kolejki przy każdym wyjściu z gry
+        if recorder is not None:
+            recorder.close()
+            print(recorder.summary())
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,106 @@
+import os
+import math
+
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from icy_tower import WIDTH, HEIGHT, PLATFORM_HEIGHT, SPIKE_HIT_RANGE, SPIKE_SPRITE_HEIGHT, COIN_SPRITE_RADIUS
+
+# Kanały obserwacji - każdy to osobna maska 0/255
+CHANNELS = ("normal", "moving", "slippery", "spikes", "coins", "lava", "player")
+CHANNEL_NORMAL = 0
+CHANNEL_MOVING = 1
+CHANNEL_SLIPPERY = 2
+CHANNEL_SPIKES = 3
+CHANNEL_COINS = 4
+CHANNEL_LAVA = 5
+CHANNEL_PLAYER = 6
+
+# Zakres pikseli [a, b) dla odcinka świata [lo, hi) w skali obserwacji. Każdy
+# widoczny obiekt zajmuje co najmniej jeden piksel, nawet gdy jest cieńszy.
+def pixel_span(lo, hi, scale, size):
+    a = math.floor(lo * scale)
+    b = max(a + 1, math.ceil(hi * scale))
+    return max(a, 0), max(min(b, size), 0)
+
+# Obserwacja stanu gry w niskiej rozdzielczości, bez pygame.draw i bez ekranu.
+# Stan Simulation jest rasteryzowany prostokątami wprost do jednego bufora
+# NumPy (kanały x wysokość x szerokość, uint8), używanego w każdym kroku.
+# Przy stack > 1 ostatnie klatki są trzymane w buforze cyklicznym.
+class ObservationRasterizer:
+    def __init__(self, width=84, height=84, stack=1):
+        self.width = width
+        self.height = height
+        self.stack = stack
+        self.scale_x = width / WIDTH
+        self.scale_y = height / HEIGHT
+        self.frames = np.zeros((stack, len(CHANNELS), height, width), dtype=np.uint8)
+        self.head = 0
+
+        # Kolejność klatek od najstarszej dla każdej pozycji głowicy i bufor na wynik stacked()
+        self.orders = [np.roll(np.arange(stack), -(head + 1)) for head in range(stack)]
+        self.stacked_out = np.empty_like(self.frames)
+
+    def reset(self):
+        self.frames.fill(0)
+        self.head = 0
+
+    def observe(self, sim):
+        # Nowa klatka nadpisuje najstarszą w buforze cyklicznym
+        self.head = (self.head + 1) % self.stack
+        frame = self.frames[self.head]
+        self.rasterize(sim, frame)
+        return frame
+
+    def stacked(self):
+        # Ostatnie `stack` klatek od najstarszej, w stałym buforze wyjściowym
+        if self.stack == 1:
+            return self.frames
+        return np.take(self.frames, self.orders[self.head], axis=0, out=self.stacked_out)
+
+    def rasterize(self, sim, frame):
+        frame.fill(0)
+        width, height = self.width, self.height
+        scale_x, scale_y = self.scale_x, self.scale_y
+        camera_y = sim.camera_y
+
+        # Lawa - wszystko od jej powierzchni w dół
+        lava_top = sim.lava.height - camera_y
+        if lava_top < HEIGHT:
+            top, bottom = pixel_span(lava_top, HEIGHT, scale_y, height)
+            frame[CHANNEL_LAVA, top:bottom] = 255
+
+        # Tylko platformy w kadrze (z zapasem na kolce i monety nad nimi)
+        for platform in sim.platforms.between(camera_y - PLATFORM_HEIGHT, camera_y + HEIGHT + 30 + COIN_SPRITE_RADIUS):
+            screen_y = platform.y - camera_y
+            top, bottom = pixel_span(screen_y, screen_y + platform.height, scale_y, height)
+            left, right = pixel_span(platform.x, platform.x + platform.width, scale_x, width)
+            if platform.is_moving:
+                channel = CHANNEL_MOVING
+            elif platform.is_slippery:
+                channel = CHANNEL_SLIPPERY
+            else:
+                channel = CHANNEL_NORMAL
+            frame[channel, top:bottom, left:right] = 255
+
+            if platform.has_spikes:
+                spike_x = platform.x + platform.spike_offset
+                top, bottom = pixel_span(screen_y - SPIKE_SPRITE_HEIGHT, screen_y, scale_y, height)
+                left, right = pixel_span(spike_x - SPIKE_HIT_RANGE, spike_x + SPIKE_HIT_RANGE, scale_x, width)
+                frame[CHANNEL_SPIKES, top:bottom, left:right] = 255
+
+            # Moneta w miejscu, w którym liczy się jej zebranie (bez animacji kołysania)
+            if platform.has_coin and not platform.coin_collected:
+                coin_x = platform.x + platform.width / 2
+                coin_y = screen_y - 30
+                top, bottom = pixel_span(coin_y - COIN_SPRITE_RADIUS, coin_y + COIN_SPRITE_RADIUS, scale_y, height)
+                left, right = pixel_span(coin_x - COIN_SPRITE_RADIUS, coin_x + COIN_SPRITE_RADIUS, scale_x, width)
+                frame[CHANNEL_COINS, top:bottom, left:right] = 255
+
+        player = sim.player
+        screen_y = player.y - camera_y
+        top, bottom = pixel_span(screen_y, screen_y + player.height, scale_y, height)
+        left, right = pixel_span(player.x, player.x + player.width, scale_x, width)
+        frame[CHANNEL_PLAYER, top:bottom, left:right] = 255
+        return frame
@@ -0,0 +1,162 @@
+import os
+
+import numpy as np
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from icy_tower import (WIDTH, HEIGHT, COIN_CHANCE, REGIONS, TOWER_BASE_Y, CHUNK_HEIGHT,
+                       Platform, region_for_height)
+
+# Typy platform w tablicach
+KIND_NORMAL = 0
+KIND_MOVING = 1
+KIND_SLIPPERY = 2
+
+# Stałe generate_platforms i Platform.__init__
+MAX_OFFSET = 200
+MOVE_RANGE = (100, 200)
+SHINE_COUNT = 3
+SHINE_MARGIN = 10
+
+# Wiersze tablicy losowań jednej partii
+(ROLL_WIDTH, ROLL_CENTER, ROLL_TYPE, ROLL_SPEED, ROLL_RANGE, ROLL_SPIKES, ROLL_COIN,
+ ROLL_COIN_OFFSET, ROLL_SHINE) = range(9)
+ROLLS = ROLL_SHINE + SHINE_COUNT
+
+# Tabele regionów liczone raz: progi skumulowanego prawdopodobieństwa typu
+# (ruchoma, ruchoma + śliska), szansa kolców, prędkości, szerokości i odstęp.
+# Po zmianie REGIONS (np. przegląd gap_y) trzeba je zbudować od nowa.
+def build_region_tables():
+    tables = []
+    for region in REGIONS:
+        types = region["platform_types"]
+        tables.append({
+            "thresholds": (types["moving"], types["moving"] + types["slippery"]),
+            "spikes": types["spikes"],
+            "speeds": np.array(region["platform_speed"], dtype=np.int64),
+            "width": region["platform_width"],
+            "gap_y": region["gap_y"],
+        })
+    return tables
+
+REGION_TABLES = build_region_tables()
+
+def randint(roll, low, high):
+    # Odpowiednik random.randint(low, high) dla tablicy losowań z [0, 1)
+    return low + (roll * (high - low + 1)).astype(np.int64)
+
+# Platformy w tablicach (wiersze x pozycja w łańcuchu), bez obiektów Platform.
+# Każdy wiersz to osobny łańcuch, tak jak jedno wywołanie generate_platforms.
+class PlatformBatch:
+    def __init__(self, region, y, x, width, kind, vel_x, move_range, has_spikes, has_coin,
+                 coin_offset, shine_offsets):
+        self.region = region
+        self.y = y
+        self.x = x
+        self.width = width
+        self.kind = kind
+        self.vel_x = vel_x
+        self.move_range = move_range
+        self.has_spikes = has_spikes
+        self.has_coin = has_coin
+        self.coin_offset = coin_offset
+        self.shine_offsets = shine_offsets
+
+    @property
+    def shape(self):
+        return self.x.shape
+
+    def platforms(self, row):
+        # Łańcuch jako obiekty Platform (do PlatformIndex, Simulation i narzędzi)
+        region = self.region
+        y = self.y[row].tolist()
+        x = self.x[row].tolist()
+        width = self.width[row].tolist()
+        kind = self.kind[row].tolist()
+        vel_x = self.vel_x[row].tolist()
+        move_range = self.move_range[row].tolist()
+        has_spikes = self.has_spikes[row].tolist()
+        has_coin = self.has_coin[row].tolist()
+        coin_offset = self.coin_offset[row].tolist()
+        shine_offsets = self.shine_offsets[row].tolist()
+
+        platforms = []
+        for i in range(len(x)):
+            slippery = kind[i] == KIND_SLIPPERY
+            platforms.append(Platform.from_rolls(
+                x[i], y[i], width[i], region, coin_offset[i],
+                is_moving=kind[i] == KIND_MOVING, is_slippery=slippery, has_spikes=has_spikes[i],
+                has_coin=has_coin[i], vel_x=vel_x[i], move_range=move_range[i],
+                shine_positions=tuple(x[i] + offset for offset in shine_offsets[i]) if slippery else ()))
+        return platforms
+
+# Odpowiednik generate_platforms dla `rows` niezależnych łańcuchów naraz.
+# Wszystkie losowania partii to jedno rng.random; sekwencyjna jest tylko
+# pętla po pozycji w łańcuchu (środek zależy od poprzedniego), wektorowa po
+# wierszach. Rozkłady są te same co w grze, ale losowanie jest inne - wieże
+# nie pokrywają się z Tower dla tego samego ziarna.
+def generate_batch(rng, rows, count, start_y, region=0, last_center_x=WIDTH // 2, end_center_x=None):
+    table = REGION_TABLES[region]
+    rolls = rng.random((ROLLS, rows, count))
+    y = np.asarray(start_y, dtype=np.int64).reshape(-1, 1) - np.arange(count) * table["gap_y"]
+    y = np.broadcast_to(y, (rows, count))
+
+    width = randint(rolls[ROLL_WIDTH], *table["width"])
+    half = width // 2
+    centers = np.empty((rows, count), dtype=np.int64)
+    last = np.broadcast_to(np.asarray(last_center_x, dtype=np.int64), (rows,))
+    for i in range(count):
+        low = np.maximum(half[:, i], last - MAX_OFFSET)
+        high = np.minimum(WIDTH - half[:, i], last + MAX_OFFSET)
+        if end_center_x is not None:
+            reach = (count - 1 - i) * MAX_OFFSET
+            low = np.maximum(low, end_center_x - reach)
+            high = np.minimum(high, end_center_x + reach)
+        last = randint(rolls[ROLL_CENTER, :, i], low, high)
+        centers[:, i] = last
+    x = centers - half
+
+    moving_threshold, slippery_threshold = table["thresholds"]
+    type_roll = rolls[ROLL_TYPE]
+    kind = np.where(type_roll < moving_threshold, KIND_MOVING,
+                    np.where(type_roll < slippery_threshold, KIND_SLIPPERY, KIND_NORMAL))
+    moving = kind == KIND_MOVING
+    speeds = table["speeds"]
+    vel_x = np.where(moving, speeds[(rolls[ROLL_SPEED] * len(speeds)).astype(np.int64)], 0)
+    move_range = np.where(moving, randint(rolls[ROLL_RANGE], *MOVE_RANGE), 0)
+
+    has_spikes = rolls[ROLL_SPIKES] < table["spikes"]
+    has_coin = ~has_spikes & (rolls[ROLL_COIN] < COIN_CHANCE)
+    coin_offset = rolls[ROLL_COIN_OFFSET] * 6.28
+
+    # Błyski śliskich platform jako przesunięcia względem x
+    shine_offsets = randint(np.moveaxis(rolls[ROLL_SHINE:], 0, -1), SHINE_MARGIN,
+                            (width - SHINE_MARGIN)[..., None])
+
+    return PlatformBatch(region, y, x, width, kind, vel_x, move_range, has_spikes, has_coin,
+                         coin_offset, shine_offsets)
+
+# Wieże w układzie Tower (kawałki CHUNK_HEIGHT, region z wysokości kawałka,
+# każdy kawałek kończy się na środku ekranu). Kawałki są niezależne, więc
+# wszystkie kawałki jednego regionu ze wszystkich wież to jedna partia.
+def generate_towers(rng, towers, chunks):
+    chunk_rows = {}
+    for index in range(chunks):
+        bottom_y = TOWER_BASE_Y - index * CHUNK_HEIGHT
+        chunk_rows.setdefault(region_for_height(bottom_y), []).append((index, bottom_y))
+
+    parts = [None] * chunks
+    for region, members in chunk_rows.items():
+        count = -(-CHUNK_HEIGHT // REGION_TABLES[region]["gap_y"])
+        bottom_y = np.tile([bottom for _, bottom in members], towers)
+        batch = generate_batch(rng, towers * len(members), count, bottom_y, region, end_center_x=WIDTH // 2)
+        for position, (index, _) in enumerate(members):
+            parts[index] = (batch, np.arange(towers) * len(members) + position)
+    return parts
+
+def tower_platforms(parts, tower):
+    # Platformy jednej wieży od dołu, z platformą startową jak w Simulation
+    platforms = [Platform(0, HEIGHT - 100, WIDTH, 0)]
+    for batch, rows in parts:
+        platforms.extend(batch.platforms(rows[tower]))
+    return platforms
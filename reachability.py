@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+from collections import Counter
+from multiprocessing import Pool
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from icy_tower import WIDTH, HEIGHT, PLAYER_WIDTH, REGIONS, Player, Platform, Tower, region_for_height
+
+# Największe przesunięcie poślizgu przy skoku ze śliskiej platformy (Player.jump)
+SLIPPERY_KICK_MAX = 12.0
+SLIPPERY_JUMP_SCALE = 1.2
+
+# Odstępy regionów z gry, od których liczy się --gap-scale
+BASE_GAP_Y = [region["gap_y"] for region in REGIONS]
+
+# Obwiednia skoku: dla każdej całkowitej różnicy wysokości dy (cel wyżej o dy)
+# numer klatki, w której opadający gracz ląduje na tej wysokości. Tor jest
+# liczony raz, tą samą rekurencją co Player.update (vel_y += gravity,
+# y += vel_y), więc wynik zgadza się z grą co do klatki.
+class JumpEnvelope:
+    def __init__(self, jump_power, gravity, speed, min_dy=-HEIGHT):
+        self.speed = speed
+        self.min_dy = min_dy
+        self.frames = {}
+        vel = jump_power
+        rise = 0.0
+        frame = 0
+        self.apex = 0.0
+        while rise >= min_dy:
+            frame += 1
+            vel += gravity
+            prev_rise = rise
+            rise -= vel
+            self.apex = max(self.apex, rise)
+            if vel <= 0:
+                continue
+            # Stopy przeszły w tej klatce od prev_rise do rise - cele na tych wysokościach łapią gracza
+            for dy in range(math.ceil(rise), math.floor(prev_rise) + 1):
+                self.frames.setdefault(dy, frame)
+        self.max_dy = math.floor(self.apex)
+
+    def landing_frame(self, dy):
+        return self.frames.get(dy)
+
+    def horizontal_reach(self, dy):
+        frame = self.frames.get(dy)
+        if frame is None:
+            return None
+        return self.speed * frame
+
+def player_envelopes():
+    player = Player()
+    normal = JumpEnvelope(player.jump_power, player.gravity, player.speed)
+    slippery = JumpEnvelope(player.jump_power * SLIPPERY_JUMP_SCALE, player.gravity, player.speed)
+    return normal, slippery
+
+# Zakres x gracza stojącego na platformie (ruchome - cały zakres ruchu)
+def standing_span(platform):
+    if platform.is_moving:
+        return platform.left_limit - PLAYER_WIDTH, platform.right_limit + platform.width
+    return platform.x - PLAYER_WIDTH, platform.x + platform.width
+
+def can_reach(source, target, span_source, span_target, normal, slippery):
+    dy = source.y - target.y
+    if source.is_slippery:
+        reach = slippery.horizontal_reach(dy)
+        if reach is None:
+            return False
+        # Poślizg może zepchnąć gracza w złą stronę w klatce skoku
+        reach -= SLIPPERY_KICK_MAX
+    else:
+        reach = normal.horizontal_reach(dy)
+        if reach is None:
+            return False
+    gap = max(0, span_target[0] - span_source[1], span_source[0] - span_target[1])
+    return gap < reach
+
+# Analiza jednej wieży (platformy od dołu). Platforma jest "zablokowana", gdy
+# żadna niższa platforma w zasięgu skoku jej nie sięga, a wieża "utyka", gdy
+# od najwyższej osiągalnej platformy nie da się już pójść wyżej.
+def analyze_tower(platforms, normal, slippery):
+    count = len(platforms)
+    spans = [standing_span(p) for p in platforms]
+    max_dy = max(normal.max_dy, slippery.max_dy)
+    reachable = [False] * count
+    reachable[0] = True
+    blocked = Counter()
+    totals = Counter()
+
+    for j in range(1, count):
+        target = platforms[j]
+        region = region_for_height(target.y)
+        totals[region] += 1
+        any_edge = False
+        i = j - 1
+        while i >= 0 and platforms[i].y - target.y <= max_dy:
+            if can_reach(platforms[i], target, spans[i], spans[j], normal, slippery):
+                any_edge = True
+                if reachable[i]:
+                    reachable[j] = True
+                    break
+            i -= 1
+        if not any_edge:
+            blocked[region] += 1
+
+    highest = max(j for j in range(count) if reachable[j])
+    stuck_region = None
+    if highest < count - 1:
+        stuck_region = region_for_height(platforms[highest].y)
+    return totals, blocked, stuck_region, platforms[highest].y
+
+def tower_platforms(seed, chunks):
+    starting_platform = Platform(0, HEIGHT - 100, WIDTH, 0)
+    tower = Tower(seed, cache_size=1)
+    platforms = [starting_platform]
+    for index in range(chunks):
+        platforms.extend(tower.chunk(index))
+    return platforms
+
+def batched_towers(first_seed, count, chunks):
+    # Wieże z platform_batch - jedna partia NumPy na zadanie. Te same rozkłady
+    # co w grze, ale inne losowanie, więc ziarna nie odpowiadają wieżom z gry.
+    import numpy as np
+    from platform_batch import generate_towers, tower_platforms as batch_tower_platforms
+    parts = generate_towers(np.random.default_rng(first_seed), count, chunks)
+    return (batch_tower_platforms(parts, tower) for tower in range(count))
+
+# Przegląd parametrów - skalowanie gap_y wszystkich regionów. Wywoływane w
+# procesie głównym (raport) i jako initializer każdego procesu roboczego:
+# przy starcie spawn/forkserver procesy importują icy_tower od nowa i nie
+# widzą zmian z procesu głównego. Liczone od BASE_GAP_Y, więc po fork
+# drugie wywołanie niczego nie psuje.
+def apply_gap_scale(gap_scale, batched=False):
+    for region, gap_y in zip(REGIONS, BASE_GAP_Y):
+        region["gap_y"] = int(round(gap_y * gap_scale))
+    if batched:
+        import platform_batch
+        platform_batch.REGION_TABLES = platform_batch.build_region_tables()
+
+def analyze_seed_range(task):
+    first_seed, count, chunks, batched = task
+    normal, slippery = player_envelopes()
+    totals = Counter()
+    blocked = Counter()
+    stuck = Counter()
+    if batched:
+        towers = batched_towers(first_seed, count, chunks)
+    else:
+        towers = (tower_platforms(seed, chunks) for seed in range(first_seed, first_seed + count))
+    for platforms in towers:
+        tower_totals, tower_blocked, stuck_region, _ = analyze_tower(platforms, normal, slippery)
+        totals.update(tower_totals)
+        blocked.update(tower_blocked)
+        if stuck_region is not None:
+            stuck[stuck_region] += 1
+    return totals, blocked, stuck
+
+def main():
+    parser = argparse.ArgumentParser(description="Sprawdzenie osiągalności platform w wygenerowanych wieżach")
+    parser.add_argument("--seeds", type=int, default=1000, help="liczba wież (ziaren)")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--chunks", type=int, default=20, help="kawałków wieży na ziarno")
+    parser.add_argument("--gap-scale", type=float, default=1.0, help="mnożnik gap_y wszystkich regionów")
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--numpy", action="store_true",
+                        help="generuj wieże partiami NumPy (platform_batch) - szybciej, inne wieże niż w grze")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--out", help="zapisz raport JSON do pliku zamiast na stdout")
+    args = parser.parse_args()
+
+    apply_gap_scale(args.gap_scale)
+
+    tasks = [(first, min(args.batch, args.first_seed + args.seeds - first), args.chunks, args.numpy)
+             for first in range(args.first_seed, args.first_seed + args.seeds, args.batch)]
+
+    start = time.perf_counter()
+    totals = Counter()
+    blocked = Counter()
+    stuck = Counter()
+    with Pool(args.jobs, initializer=apply_gap_scale, initargs=(args.gap_scale, args.numpy)) as pool:
+        for task_totals, task_blocked, task_stuck in pool.imap_unordered(analyze_seed_range, tasks):
+            totals.update(task_totals)
+            blocked.update(task_blocked)
+            stuck.update(task_stuck)
+    elapsed = time.perf_counter() - start
+
+    normal, slippery = player_envelopes()
+    report = {
+        "towers": args.seeds,
+        "platforms": sum(totals.values()),
+        "platforms_per_second": sum(totals.values()) / max(elapsed, 1e-9),
+        "jump_apex": normal.apex,
+        "slippery_jump_apex": slippery.apex,
+        "regions": {
+            region["name"]: {
+                "gap_y": region["gap_y"],
+                "platforms": totals[i],
+                "unreachable": blocked[i],
+                "unreachable_rate": blocked[i] / totals[i] if totals[i] else 0.0,
+                "towers_stuck": stuck[i],
+            }
+            for i, region in enumerate(REGIONS)
+        },
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
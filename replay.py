@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
+# Weryfikacja bez okna - symulacja nie potrzebuje wyświetlacza
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import icy_tower
+import fast_forward
+from icy_tower import load_replay
+
+def verify_file(path, frame_by_frame=False):
+    try:
+        seed, difficulty, input_log, score = load_replay(path)
+    except ValueError as error:
+        return path, False, None, None, 0, str(error)
+    # Odcinki bez wejścia są przewijane analitycznie, wynik jest identyczny
+    replay = icy_tower.replay if frame_by_frame else fast_forward.replay
+    try:
+        sim = replay(seed, difficulty, input_log)
+    except ValueError as error:
+        return path, False, None, score, len(input_log), str(error)
+    ok = sim.score == score
+    return path, ok, sim.score, score, len(input_log), None
+
+def main():
+    parser = argparse.ArgumentParser(description="Weryfikacja zapisanych przebiegów (.icyr)")
+    parser.add_argument("paths", nargs="+", help="pliki z zapisem przebiegu")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="liczba procesów")
+    parser.add_argument("--frame-by-frame", action="store_true", help="licz każdą klatkę, bez przewijania")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    total_frames = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = pool.map(verify_file, args.paths, repeat(args.frame_by_frame), chunksize=16)
+        for path, ok, replayed_score, score, frames, error in results:
+            total_frames += frames
+            if ok:
+                print(f"OK    {path}: score {score}, {frames} frames")
+            elif score is None:
+                # Plik, którego nie da się wczytać - błąd zawiera już ścieżkę
+                failed += 1
+                print(f"FAIL  {error}")
+            else:
+                failed += 1
+                reason = error or f"replayed score {replayed_score}"
+                print(f"FAIL  {path}: claimed {score}, {reason}")
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(args.paths)} replays, {failed} failed, "
+          f"{total_frames / max(elapsed, 1e-9):.0f} frames/s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
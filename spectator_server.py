@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import math
+import asyncio
+import argparse
+import threading
+from collections import OrderedDict
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from icy_tower import HEIGHT
+
+SPECTATOR_PORT = 8765
+SPECTATOR_HISTORY = 120
+SPECTATOR_BUFFER = 64 * 1024
+
+# Typy platform w wiadomościach
+PLATFORM_NORMAL = 0
+PLATFORM_MOVING = 1
+PLATFORM_SLIPPERY = 2
+
+# Stan jednej klatki do wysłania widzom: niezmienne krotki, budowane w wątku
+# gry i oddawane pętli asyncio bez kopiowania. Platformy są kluczowane po y,
+# które w wieży jest unikalne i się nie zmienia.
+def spectator_state(sim):
+    player = sim.player
+    camera_y = sim.camera_y
+    platforms = {}
+    for platform in sim.platforms.between(camera_y - 50, camera_y + HEIGHT + 50):
+        if platform.is_moving:
+            kind = PLATFORM_MOVING
+        elif platform.is_slippery:
+            kind = PLATFORM_SLIPPERY
+        else:
+            kind = PLATFORM_NORMAL
+        platforms[platform.y] = (platform.x, platform.width, kind, platform.has_spikes,
+                                 platform.has_coin and not platform.coin_collected)
+    lava = sim.lava.height
+    return (sim.frame, sim.score, sim.game_over, round(camera_y, 1),
+            round(lava, 1) if math.isfinite(lava) else None,
+            (round(player.x, 1), round(player.y, 1), player.character_state, player.coins, player.current_region),
+            platforms)
+
+# Połączenie jednego widza. Widz dostaje różnicę między wersją stanu, którą
+# ostatnio przekazaliśmy do jego gniazda, a najnowszą. Gdy bufor zapisu
+# wolnego widza się zapełni, wersje pośrednie są pomijane - po opróżnieniu
+# bufora widz dostaje od razu najnowszy stan, a gra nigdy na niego nie czeka.
+class SpectatorConnection(asyncio.Protocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.sent_version = 0
+        self.paused = False
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(high=SPECTATOR_BUFFER)
+        self.server.clients.add(self)
+        self.send()
+
+    def connection_lost(self, exc):
+        self.server.clients.discard(self)
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        self.send()
+
+    def send(self):
+        version = self.server.version
+        if version != self.sent_version and not self.paused:
+            self.transport.write(self.server.delta(self.sent_version, version))
+            self.sent_version = version
+
+# Serwer dla widzów na własnym wątku z pętlą asyncio. Każdy publish() to
+# nowa wersja stanu. Różnice są liczone i kodowane raz na parę wersji,
+# wspólnie dla wszystkich widzów na tej samej wersji. Protokół: JSON lines.
+class SpectatorServer:
+    def __init__(self, host="127.0.0.1", port=SPECTATOR_PORT, history=SPECTATOR_HISTORY):
+        self.host = host
+        self.port = port
+        self.history_size = history
+        self.history = OrderedDict()
+        self.version = 0
+        self.delta_cache = {}
+        self.clients = set()
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="spectator-server", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+        return self
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(
+            self.loop.create_server(lambda: SpectatorConnection(self), self.host, self.port))
+        # Port 0 - system wybiera wolny port
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            for client in list(self.clients):
+                client.transport.abort()
+            self.loop.run_until_complete(self.server.wait_closed())
+            self.loop.close()
+
+    def publish(self, sim):
+        # Wywoływane z wątku gry - tylko zbudowanie stanu i przekazanie do pętli
+        self.loop.call_soon_threadsafe(self.push, spectator_state(sim))
+
+    def push(self, state):
+        self.version += 1
+        self.history[self.version] = state
+        if len(self.history) > self.history_size:
+            self.history.popitem(last=False)
+        self.delta_cache.clear()
+        for client in self.clients:
+            client.send()
+
+    def delta(self, base, version):
+        key = (base, version)
+        message = self.delta_cache.get(key)
+        if message is not None:
+            return message
+
+        frame, score, game_over, camera_y, lava, player, platforms = self.history[version]
+        old = self.history.get(base)
+        if old is None:
+            # Widz nowy albo za bardzo w tyle - pełny stan
+            base = 0
+            old_platforms = {}
+        else:
+            old_platforms = old[6]
+        changed = [[y, *fields] for y, fields in platforms.items() if old_platforms.get(y) != fields]
+        removed = [y for y in old_platforms if y not in platforms]
+        message = json.dumps({
+            "v": version, "base": base, "frame": frame, "score": score, "game_over": game_over,
+            "camera": camera_y, "lava": lava, "player": player, "set": changed, "del": removed,
+        }, separators=(",", ":")).encode() + b"\n"
+        self.delta_cache[key] = message
+        return message
+
+# Klient widza: składa różnice w pełny stan i zwraca go po każdej wiadomości
+async def watch(host="127.0.0.1", port=SPECTATOR_PORT):
+    reader, writer = await asyncio.open_connection(host, port)
+    platforms = {}
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            if message["base"] == 0:
+                platforms.clear()
+            for y in message["del"]:
+                platforms.pop(y, None)
+            for y, *fields in message["set"]:
+                platforms[y] = fields
+            message["platforms"] = platforms
+            yield message
+    finally:
+        writer.close()
+
+async def print_updates(host, port):
+    async for message in watch(host, port):
+        x, y, state, coins, region = message["player"]
+        print(f"frame {message['frame']:6d}  score {message['score']:5d}  player ({x:6.1f}, {y:8.1f}) {state:7s}"
+              f"  platforms {len(message['platforms']):2d}  lava {message['lava']}")
+        if message["game_over"]:
+            print("GAME OVER")
+
+def main():
+    parser = argparse.ArgumentParser(description="Podgląd gry nadawanej przez icy_tower.py --spectate")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=SPECTATOR_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(print_updates(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except ConnectionRefusedError:
+        print(f"no game is broadcasting on {args.host}:{args.port}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
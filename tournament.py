@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import random
+import argparse
+from collections import Counter, defaultdict
+from multiprocessing import Pool
+
+# Epizody działają bez okna
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from icy_tower import (REGIONS, DIFFICULTY_SETTINGS, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP,
+                       INPUT_HYPER, Simulation)
+
+DIFFICULTIES = list(DIFFICULTY_SETTINGS)
+
+# Polityki sterujące graczem. Każda fabryka dostaje generator losowy epizodu
+# i zwraca funkcję (sim) -> bity INPUT_* na daną klatkę. Do procesów roboczych
+# trafia tylko nazwa polityki, więc nic ciężkiego nie jest serializowane.
+def idle_policy(rng):
+    return lambda sim: 0
+
+def random_policy(rng):
+    state = {"inputs": 0}
+
+    def act(sim):
+        if sim.frame % 10 == 0:
+            state["inputs"] = rng.getrandbits(4)
+        return state["inputs"]
+    return act
+
+def next_platform_above(sim):
+    feet = sim.player.y + sim.player.height
+    for platform in sim.platforms:
+        if platform.y < feet - 1:
+            return platform
+    return None
+
+def climber_policy(rng, use_hyper=False):
+    # Skacze bez przerwy i kieruje się pod środek najbliższej platformy powyżej
+    def act(sim):
+        player = sim.player
+        inputs = INPUT_JUMP
+        if use_hyper and player.hyper_jump_charges > 0:
+            inputs |= INPUT_HYPER
+        target = next_platform_above(sim)
+        if target is not None:
+            target_x = target.x + target.width / 2
+            player_x = player.x + player.width / 2
+            if target_x < player_x - 10:
+                inputs |= INPUT_LEFT
+            elif target_x > player_x + 10:
+                inputs |= INPUT_RIGHT
+        return inputs
+    return act
+
+POLICIES = {
+    "idle": idle_policy,
+    "random": random_policy,
+    "climber": climber_policy,
+    "hyper_climber": lambda rng: climber_policy(rng, use_hyper=True),
+}
+
+def run_episode(policy_name, seed, difficulty, max_frames):
+    sim = Simulation(difficulty, seed=seed)
+    act = POLICIES[policy_name](random.Random(seed))
+    step = sim.step
+    while not sim.game_over and sim.frame < max_frames:
+        step(act(sim))
+    cause = sim.death_cause or "timeout"
+    return (policy_name, seed, difficulty, sim.score, sim.player.current_region, cause, sim.frame)
+
+def run_batch(task):
+    # Jedno zadanie to cały zakres ziaren - mniej komunikacji między procesami
+    policy_name, difficulty, first_seed, count, max_frames = task
+    return [run_episode(policy_name, seed, difficulty, max_frames)
+            for seed in range(first_seed, first_seed + count)]
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def aggregate(results):
+    groups = defaultdict(list)
+    for result in results:
+        groups[(result[0], result[2])].append(result)
+
+    summary = {}
+    for (policy_name, difficulty), episodes in sorted(groups.items()):
+        scores = sorted(episode[3] for episode in episodes)
+        regions = Counter(REGIONS[episode[4]]["name"] for episode in episodes)
+        causes = Counter(episode[5] for episode in episodes)
+        summary[f"{policy_name}/{difficulty}"] = {
+            "episodes": len(episodes),
+            "score_mean": sum(scores) / len(scores),
+            "score_p50": percentile(scores, 0.5),
+            "score_p90": percentile(scores, 0.9),
+            "score_max": scores[-1],
+            "frames_mean": sum(episode[6] for episode in episodes) / len(episodes),
+            "regions": dict(regions),
+            "death_causes": dict(causes),
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Turniej botów na wielu ziarnach i poziomach trudności")
+    parser.add_argument("--policies", nargs="+", default=["climber"], choices=sorted(POLICIES))
+    parser.add_argument("--difficulties", nargs="+", default=DIFFICULTIES, choices=DIFFICULTIES)
+    parser.add_argument("--seeds", type=int, default=1000, help="liczba ziaren na parę (polityka, trudność)")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--max-frames", type=int, default=60 * 60 * 5, help="limit klatek na epizod")
+    parser.add_argument("--batch", type=int, default=25, help="ziaren w jednym zadaniu procesu")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--episodes-out", help="zapisuj wyniki epizodów jako JSON lines")
+    parser.add_argument("--out", help="zapisz podsumowanie JSON do pliku zamiast na stdout")
+    args = parser.parse_args()
+
+    tasks = []
+    for policy_name in args.policies:
+        for difficulty in args.difficulties:
+            for first in range(args.first_seed, args.first_seed + args.seeds, args.batch):
+                count = min(args.batch, args.first_seed + args.seeds - first)
+                tasks.append((policy_name, difficulty, first, count, args.max_frames))
+
+    start = time.perf_counter()
+    results = []
+    episodes_file = open(args.episodes_out, "w") if args.episodes_out else None
+    with Pool(args.jobs) as pool:
+        # Wyniki spływają w miarę kończenia zadań
+        for batch in pool.imap_unordered(run_batch, tasks):
+            results.extend(batch)
+            if episodes_file is not None:
+                for policy_name, seed, difficulty, score, region, cause, frames in batch:
+                    episodes_file.write(json.dumps({
+                        "policy": policy_name, "seed": seed, "difficulty": difficulty, "score": score,
+                        "region": REGIONS[region]["name"], "cause": cause, "frames": frames,
+                    }) + "\n")
+    if episodes_file is not None:
+        episodes_file.close()
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "episodes": len(results),
+        "seconds": elapsed,
+        "frames_per_second": sum(result[6] for result in results) / max(elapsed, 1e-9),
+        "summary": aggregate(results),
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()